@@ -0,0 +1,293 @@
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import genetic
+
+
+class AnnealingState:
+    """Incremental slot/room occupancy and per-course conflict counters for SA moves"""
+
+    # Shared with every engine's objective (genetic holds the single set)
+    CONFLICT_PENALTY = genetic.CONFLICT_PENALTY
+    ROOM_PENALTY = genetic.ROOM_PENALTY
+    CAPACITY_PENALTY = genetic.CAPACITY_PENALTY
+    ABSENCE_PENALTY = genetic.ABSENCE_PENALTY
+
+    def __init__(self, neighbors, enrollment, room_capacity, n_slots, slots, rooms, blocked=None):
+        self.neighbors = [list(nbrs) for nbrs in neighbors]
+        self.enrollment = [int(e) for e in enrollment]
+        self.room_capacity = [int(c) for c in room_capacity]
+        self.n_courses = len(self.enrollment)
+        self.n_rooms = len(self.room_capacity)
+        self.n_slots = n_slots
+        self.slots = [int(t) for t in slots]
+        self.rooms = [int(r) for r in rooms]
+        # blocked[c][t]: course c may not sit in slot t (e.g. instructor absent)
+        self.blocked = [[bool(b) for b in row] for row in blocked] if blocked is not None else None
+
+        # occupancy[t][r]: courses sitting in room r during slot t
+        self.occupancy = [[0] * self.n_rooms for _ in range(n_slots)]
+        # slot_conflicts[c][t]: neighbours of course c currently placed in slot t
+        self.slot_conflicts = [[0] * n_slots for _ in range(self.n_courses)]
+        for c in range(self.n_courses):
+            self.occupancy[self.slots[c]][self.rooms[c]] += 1
+            for nb in self.neighbors[c]:
+                self.slot_conflicts[nb][self.slots[c]] += 1
+
+        self.cost = self.full_cost()
+
+    def capacity_cost(self, c, r):
+        overflow = self.enrollment[c] - self.room_capacity[r]
+        return self.CAPACITY_PENALTY * overflow if overflow > 0 else 0
+
+    def full_cost(self):
+        """Cost of the whole assignment, computed from the counters"""
+        conflicts = sum(self.slot_conflicts[c][self.slots[c]] for c in range(self.n_courses)) // 2
+        room_clashes = sum(n - 1 for row in self.occupancy for n in row if n > 1)
+        capacity = sum(self.capacity_cost(c, self.rooms[c]) for c in range(self.n_courses))
+        absences = sum(self.blocked[c][self.slots[c]] for c in range(self.n_courses)) if self.blocked else 0
+        return (self.CONFLICT_PENALTY * conflicts + self.ROOM_PENALTY * room_clashes + capacity
+                + self.ABSENCE_PENALTY * absences)
+
+    def move_delta(self, c, t, r):
+        """Cost change of moving course c to (slot t, room r), in O(1)"""
+        t0, r0 = self.slots[c], self.rooms[c]
+        if t == t0 and r == r0:
+            return 0
+        delta = 0
+        if t != t0:
+            row = self.slot_conflicts[c]
+            delta += self.CONFLICT_PENALTY * (row[t] - row[t0])
+            if self.blocked:
+                delta += self.ABSENCE_PENALTY * (self.blocked[c][t] - self.blocked[c][t0])
+        # Leaving (t0, r0) removes a clash if others remain; joining (t, r) adds one if occupied
+        if self.occupancy[t0][r0] > 1:
+            delta -= self.ROOM_PENALTY
+        if self.occupancy[t][r] > 0:
+            delta += self.ROOM_PENALTY
+        delta += self.capacity_cost(c, r) - self.capacity_cost(c, r0)
+        return delta
+
+    def apply_move(self, c, t, r, delta=None):
+        """Move course c to (slot t, room r), updating counters in O(degree)"""
+        if delta is None:
+            delta = self.move_delta(c, t, r)
+        t0, r0 = self.slots[c], self.rooms[c]
+        self.occupancy[t0][r0] -= 1
+        self.occupancy[t][r] += 1
+        if t != t0:
+            slot_conflicts = self.slot_conflicts
+            for nb in self.neighbors[c]:
+                row = slot_conflicts[nb]
+                row[t0] -= 1
+                row[t] += 1
+        self.slots[c], self.rooms[c] = t, r
+        self.cost += delta
+
+    def restore(self, slots, rooms):
+        """Move back to a given assignment, touching only the courses that differ"""
+        for c in range(self.n_courses):
+            if self.slots[c] != slots[c] or self.rooms[c] != rooms[c]:
+                self.apply_move(c, slots[c], rooms[c])
+
+
+# Iteration budget when neither max_iterations nor a time budget is given
+DEFAULT_ITERATIONS = 100000
+
+
+def calibrate_temperature(state, rng, acceptance=0.8, samples=200):
+    """Temperature at which an average uphill move is accepted with probability `acceptance`"""
+    uphill = []
+    for _ in range(samples):
+        delta = state.move_delta(rng.randrange(state.n_courses), rng.randrange(state.n_slots),
+                                 rng.randrange(state.n_rooms))
+        if delta > 0:
+            uphill.append(delta)
+    if not uphill:
+        return 1.0
+    return -(sum(uphill) / len(uphill)) / math.log(acceptance)
+
+
+def simulated_annealing(state, max_iterations=None, time_budget=None, deadline=None, temperature=None,
+                        initial_acceptance=0.8, final_acceptance=0.001, epoch_length=None,
+                        stagnation_epochs=100, reheat_fraction=0.1, rng=None, record_every=100,
+                        on_improve=None):
+    """Run SA on an AnnealingState using single-course moves scored by delta.
+
+    The run is bounded by `max_iterations` and/or `time_budget` seconds (or an
+    absolute `deadline`); with neither it does DEFAULT_ITERATIONS moves. The
+    initial temperature is calibrated from sampled move deltas unless given.
+    After every epoch the temperature follows the acceptance rate towards a
+    target that decays from `initial_acceptance` to `final_acceptance` over
+    the budget (measured on uphill moves), and after `stagnation_epochs`
+    epochs without a new best the search returns to the best solution and is
+    reheated to `reheat_fraction` of the initial temperature. `on_improve`, if
+    given, is called as on_improve(slots, rooms, cost) after every epoch that
+    found a new best.
+
+    Returns a dict with the best slots/rooms found, its cost, the number of
+    iterations, reheats, the initial temperature and a best-cost curve
+    sampled every `record_every` iterations. The state is left at the last
+    accepted solution.
+    """
+    started = time.time()
+    rng = rng or random.Random()
+    n_courses, n_slots, n_rooms = state.n_courses, state.n_slots, state.n_rooms
+    if time_budget:
+        deadline = min(deadline, started + time_budget) if deadline else started + time_budget
+    if max_iterations is None and deadline is None:
+        max_iterations = DEFAULT_ITERATIONS
+    epoch_length = epoch_length or max(100, n_courses)
+
+    best_slots, best_rooms, best_cost = list(state.slots), list(state.rooms), state.cost
+    curve = [(0, best_cost)]
+    iterations, reheats = 0, 0
+    initial_temperature = None
+
+    if n_courses and n_rooms:
+        initial_temperature = temperature or calibrate_temperature(state, rng, initial_acceptance)
+        temperature = initial_temperature
+        move_delta, apply_move, randrange, uniform = state.move_delta, state.apply_move, rng.randrange, rng.random
+        stale = 0
+        while True:
+            uphill, accepted, improved = 0, 0, False
+            moves = epoch_length if max_iterations is None else min(epoch_length, max_iterations - iterations)
+            if moves <= 0:
+                break
+            for _ in range(moves):
+                c = randrange(n_courses)
+                t = randrange(n_slots)
+                r = randrange(n_rooms)
+                delta = move_delta(c, t, r)
+                accept = True
+                if delta > 0:
+                    uphill += 1
+                    accept = uniform() < math.exp(-delta / temperature)
+                    accepted += accept
+                if accept:
+                    apply_move(c, t, r, delta)
+                    if state.cost < best_cost:
+                        best_slots, best_rooms, best_cost = list(state.slots), list(state.rooms), state.cost
+                        improved = True
+                iterations += 1
+                if iterations % record_every == 0:
+                    curve.append((iterations, best_cost))
+
+            # Progress through the budget drives the target acceptance rate
+            now = time.time()
+            progress = 0.0
+            if max_iterations:
+                progress = iterations / max_iterations
+            if deadline is not None:
+                progress = max(progress, (now - started) / max(deadline - started, 1e-9))
+            if improved and on_improve is not None:
+                on_improve(best_slots, best_rooms, best_cost)
+            if progress >= 1 or best_cost == 0:
+                break
+
+            # Steer the uphill acceptance rate (zero-cost moves would mask it) to the target
+            target = initial_acceptance * (final_acceptance / initial_acceptance) ** progress
+            rate = accepted / uphill if uphill else 1.0
+            temperature *= min(2.0, max(0.5, math.sqrt((target + 1e-3) / (rate + 1e-3))))
+
+            # Stagnation: return to the best solution and reheat
+            stale = 0 if improved else stale + 1
+            if stale >= stagnation_epochs:
+                state.restore(best_slots, best_rooms)
+                temperature = max(temperature, reheat_fraction * initial_temperature)
+                reheats += 1
+                stale = 0
+
+    if curve[-1][0] != iterations:
+        curve.append((iterations, best_cost))
+    return {
+        'slots': best_slots,
+        'rooms': best_rooms,
+        'cost': best_cost,
+        'iterations': iterations,
+        'reheats': reheats,
+        'initial_temperature': round(initial_temperature, 3) if initial_temperature else None,
+        'elapsed': round(time.time() - started, 3),
+        'curve': curve
+    }
+
+
+def state_from_assignment(instance, slots, rooms):
+    """AnnealingState over a compiled ProblemInstance from a given assignment"""
+    return AnnealingState(
+        instance.neighbor_lists(),
+        instance.enrollment,
+        instance.room_capacity,
+        instance.n_slots,
+        slots,
+        rooms,
+        blocked=instance.absent
+    )
+
+
+def random_state(instance, rng):
+    """AnnealingState over a compiled ProblemInstance from a random assignment"""
+    return state_from_assignment(
+        instance,
+        [rng.randrange(instance.n_slots) for _ in range(instance.n_courses)],
+        [rng.randrange(instance.n_rooms) for _ in range(instance.n_courses)]
+    )
+
+
+# Multi-start: each worker process receives the instance once through the
+# pool initializer and then runs independent chains by seed.
+_chain_instance = None
+
+
+def _init_chain_worker(instance):
+    global _chain_instance
+    _chain_instance = instance
+
+
+def _run_chain(seed, params, deadline):
+    """Run one independent SA chain from a seeded random start"""
+    started = time.time()
+    rng = random.Random(seed)
+    result = simulated_annealing(random_state(_chain_instance, rng), rng=rng, deadline=deadline, **params)
+    result['seed'] = seed
+    result['elapsed'] = round(time.time() - started, 3)
+    return result
+
+
+def multi_start_annealing(instance, chains=None, time_budget=None, seed=None, max_workers=None, **params):
+    """Run K independent SA chains in a process pool and keep the best.
+
+    `params` are passed to simulated_annealing. All chains share one deadline
+    derived from `time_budget` (seconds). Returns the best chain's solution
+    plus per-chain summaries with their best-cost curves.
+    """
+    started = time.time()
+    deadline = started + time_budget if time_budget else None
+    chains = max(1, chains or os.cpu_count() or 1)
+    seeds = random.Random(seed).sample(range(1 << 30), chains)
+    workers = min(chains, max_workers or os.cpu_count() or 1)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_chain_worker, initargs=(instance,)) as pool:
+        results = list(pool.map(_run_chain, seeds, [params] * chains, [deadline] * chains))
+
+    best = min(results, key=lambda result: result['cost'])
+    return {
+        'slots': best['slots'],
+        'rooms': best['rooms'],
+        'cost': best['cost'],
+        'best_seed': best['seed'],
+        'elapsed': round(time.time() - started, 3),
+        'chains': [
+            {
+                'seed': result['seed'],
+                'cost': result['cost'],
+                'iterations': result['iterations'],
+                'elapsed': result['elapsed'],
+                'curve': result['curve']
+            }
+            for result in results
+        ]
+    }
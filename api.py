@@ -1,6 +1,6 @@
-from flask import Flask, request, jsonify, redirect
+from flask import Flask, Response, request, jsonify, redirect
 from flask_cors import CORS
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, UpdateOne, ReturnDocument
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, DuplicateKeyError
 from bson import ObjectId
 import pandas as pd
@@ -8,9 +8,14 @@ from datetime import datetime, timedelta
 import json
 from functools import wraps
 import os
+import queue
+import threading
 from dotenv import load_dotenv
 
 from app import AdminSection, CSVManager
+from conflict_graph import IncrementalConflictGraph, pair_key
+from cpsat_engine import ORTOOLS_AVAILABLE
+from seating import BENCH_SIZE, course_benches, seat_plan
 
 # Load environment variables
 load_dotenv()
@@ -56,7 +61,10 @@ try:
         'students': db['students'],
         'rooms': db['rooms'],
         'final_schedule': db['final_schedule'],
-        'past_schedule': db['past_schedule']
+        'past_schedule': db['past_schedule'],
+        'conflict_pairs': db['conflict_pairs'],
+        'conflict_graph_students': db['conflict_graph_students'],
+        'conflict_graph_meta': db['conflict_graph_meta']
     }
     
     # Create indexes for better performance
@@ -65,6 +73,7 @@ try:
     collections['rooms'].create_index('room_id', unique=True)
     collections['final_schedule'].create_index('created_at')
     collections['past_schedule'].create_index('created_at')
+    collections['conflict_pairs'].create_index([('course1', 1), ('course2', 1)], unique=True)
     
 except (ConnectionFailure, ServerSelectionTimeoutError) as e:
     print(f"❌ Failed to connect to MongoDB Atlas: {e}")
@@ -107,6 +116,108 @@ def make_json_serializable(obj):
     else:
         return obj
 
+# Co-enrollment graph maintenance
+# conflict_pairs holds one document per course pair with its shared-student
+# count; course1 == course2 documents carry the course's enrollment count.
+# conflict_graph_students holds, per student, the courses those counts
+# include: an update changes it and reads its previous state in one atomic
+# operation, so of two concurrent updates for the same student exactly one
+# counts their shared pair. conflict_graph_meta stores a version that is bumped on every update so each
+# worker process can tell whether its cached graph is still current, and the
+# number of students documents the counts reflect: a graph loaded while that
+# disagrees with the collection (written to outside the enroll/unenroll
+# endpoints) is rebuilt.
+conflict_graph_cache = {'graph': None}
+
+def get_conflict_graph():
+    """Return the up-to-date co-enrollment graph, loading it only when the stored version moved"""
+    meta = collections['conflict_graph_meta'].find_one({'_id': 'version'})
+    if meta is None:
+        return rebuild_conflict_graph()
+    
+    cached = conflict_graph_cache['graph']
+    if cached is not None and cached.version == meta['version']:
+        return cached
+    
+    if meta.get('students') != collections['students'].count_documents({}):
+        print("⚠️  Stored conflict counts drifted from the students collection, rebuilding")
+        return rebuild_conflict_graph()
+    pair_counts, enrollment_counts = {}, {}
+    for doc in collections['conflict_pairs'].find({}, {'_id': 0}):
+        if doc['course1'] == doc['course2']:
+            enrollment_counts[doc['course1']] = doc['count']
+        else:
+            pair_counts[(doc['course1'], doc['course2'])] = doc['count']
+    graph = IncrementalConflictGraph(pair_counts, enrollment_counts, meta['version'])
+    conflict_graph_cache['graph'] = graph
+    return graph
+
+def rebuild_conflict_graph():
+    """Rebuild the stored co-enrollment counts from the students collection"""
+    students_df = pd.DataFrame(list(collections['students'].find({}, {'_id': 0, 'student_id': 1, 'course_code': 1})))
+    meta = collections['conflict_graph_meta'].find_one_and_update(
+        {'_id': 'version'}, {'$inc': {'version': 1}, '$set': {'students': len(students_df), 'student_courses': True}},
+        upsert=True, return_document=ReturnDocument.AFTER
+    )
+    graph = IncrementalConflictGraph.from_enrollments(students_df, meta['version'])
+    
+    docs = [{'course1': c1, 'course2': c2, 'count': n} for (c1, c2), n in graph.pair_counts.items()]
+    docs += [{'course1': c, 'course2': c, 'count': n} for c, n in graph.enrollment_counts.items()]
+    collections['conflict_pairs'].delete_many({})
+    if docs:
+        collections['conflict_pairs'].insert_many(docs)
+    
+    collections['conflict_graph_students'].delete_many({})
+    if not students_df.empty:
+        courses_by_student = students_df.groupby('student_id')['course_code'].agg(lambda codes: sorted(set(codes)))
+        collections['conflict_graph_students'].insert_many(
+            [{'_id': student_id, 'courses': courses} for student_id, courses in courses_by_student.items()]
+        )
+    conflict_graph_cache['graph'] = graph
+    return graph
+
+def update_conflict_graph(student_id, course_code, delta):
+    """Apply one enrollment (+1) or unenrollment (-1) to the stored co-enrollment counts.
+    
+    The pairs come from the student's counted courses as they were just
+    before this update changed them, not from the students collection, so
+    concurrent updates for one student never miss or double a pair.
+    """
+    meta = collections['conflict_graph_meta'].find_one({'_id': 'version'})
+    if meta is None or not meta.get('student_courses'):
+        # First use, or counts stored without per-student courses: the rebuild reflects the change
+        rebuild_conflict_graph()
+        return
+    
+    change = {'$addToSet': {'courses': course_code}} if delta > 0 else {'$pull': {'courses': course_code}}
+    before = collections['conflict_graph_students'].find_one_and_update(
+        {'_id': student_id}, change, upsert=delta > 0, return_document=ReturnDocument.BEFORE
+    )
+    counted = (before or {}).get('courses', [])
+    if (course_code in counted) == (delta > 0):
+        # Nothing to apply; any mismatch with the students collection is caught on load
+        return
+    other_courses = [other for other in counted if other != course_code]
+    keys = [(course_code, course_code)] + [pair_key(course_code, other) for other in other_courses]
+    collections['conflict_pairs'].bulk_write([
+        UpdateOne({'course1': c1, 'course2': c2}, {'$inc': {'count': delta}}, upsert=True)
+        for c1, c2 in keys
+    ])
+    if delta < 0:
+        collections['conflict_pairs'].delete_many({'count': {'$lte': 0}})
+    
+    meta = collections['conflict_graph_meta'].find_one_and_update(
+        {'_id': 'version'}, {'$inc': {'version': 1, 'students': delta}}, return_document=ReturnDocument.AFTER
+    )
+    
+    # Keep this process's cache current without reloading when no other writer raced us
+    cached = conflict_graph_cache['graph']
+    if cached is not None and cached.version == meta['version'] - 1:
+        if delta > 0:
+            cached.add_enrollment(course_code, other_courses)
+        else:
+            cached.remove_enrollment(course_code, other_courses)
+
 # Course endpoints
 @app.route('/api/courses', methods=['GET'])
 @handle_errors
@@ -178,6 +289,7 @@ def enroll_student():
     del enrollment_data['name']  # Remove lowercase version
     
     enrollment_id = collections['students'].insert_one(enrollment_data).inserted_id
+    update_conflict_graph(data['student_id'], data['course_code'], 1)
     return jsonify({'message': 'Enrollment successful', 'id': str(enrollment_id)}), 201
 
 @app.route('/api/students/<student_id>/courses', methods=['GET'])
@@ -216,6 +328,8 @@ def delete_student_from_course(student_id, course_code):
     
     if result.deleted_count == 0:
         return jsonify({'error': 'Failed to delete enrollment'}), 500
+    
+    update_conflict_graph(student_id, course_code, -1)
         
     return jsonify({'message': 'Student removed from course successfully'}), 200
 
@@ -277,6 +391,59 @@ def get_schedules():
     schedules = list(collections['final_schedule'].find())
     return jsonify([{k: convert_to_json_serializable(v) for k, v in schedule.items()} for schedule in schedules])
 
+def _store_schedule(algorithm, schedule, run_info, **extra):
+    """Archive the current schedule to past_schedule and save the new one; returns its id"""
+    latest_schedule = collections['final_schedule'].find_one(
+        sort=[('created_at', -1)]
+    )
+    
+    if latest_schedule:
+        # Append to past_schedule instead of clearing it
+        collections['past_schedule'].insert_one({
+            'algorithm': latest_schedule.get('algorithm'),
+            'schedule': latest_schedule.get('schedule'),
+            'created_at': latest_schedule.get('created_at'),
+            'archived_at': datetime.utcnow()
+        })
+    
+    return collections['final_schedule'].insert_one({
+        'algorithm': algorithm,
+        'schedule': schedule,
+        'run_info': run_info,
+        'created_at': datetime.utcnow(),
+        **extra
+    }).inserted_id
+
+def _stream_portfolio(admin, courses_df, students_df, rooms_df, constraints, **extra):
+    """Run the portfolio in the background and stream NDJSON: each best-so-far schedule, then the saved result"""
+    events = queue.Queue()
+    
+    def improved(engine, cost, elapsed, schedule):
+        events.put({'event': 'improved', 'engine': engine, 'cost': cost, 'elapsed': elapsed, 'schedule': schedule})
+    
+    def run():
+        try:
+            schedule = admin._schedule_portfolio(courses_df, students_df, rooms_df, constraints, on_improve=improved)
+            schedule_id = _store_schedule('portfolio', schedule, admin.last_run, **extra)
+            events.put({
+                'event': 'finished',
+                'message': 'Schedule generated successfully',
+                'id': str(schedule_id),
+                'schedule': schedule,
+                'run_info': admin.last_run
+            })
+        except Exception as e:
+            events.put({'event': 'error', 'error': str(e)})
+        events.put(None)
+    
+    threading.Thread(target=run, daemon=True).start()
+    
+    def generate():
+        while (event := events.get()) is not None:
+            yield json.dumps(make_json_serializable(event), default=str) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
 @app.route('/api/schedules/generate', methods=['POST'])
 @handle_errors
 def generate_schedule():
@@ -317,81 +484,105 @@ def generate_schedule():
             self.data[filename] = df
             return True
             
-    admin = AdminSection(csv_manager=TempCSVManager())
+    admin = AdminSection(csv_manager=TempCSVManager(), conflict_graph=get_conflict_graph())
     
     constraints = data.get('constraints', {})
     if 'start_date' in constraints and isinstance(constraints['start_date'], str):
         constraints['start_date'] = datetime.strptime(constraints['start_date'], "%Y-%m-%d").date()
     
+    # Reject inputs no solver can satisfy, unless the caller asks to run anyway
+    report = admin._precheck(courses_df, students_df, rooms_df, constraints, algorithm=algorithm)
+    if not report['feasible'] and not data.get('force'):
+        return jsonify({'error': 'Scheduling input is infeasible', 'precheck': report}), 422
+    
     if algorithm == 'graph_coloring':
         schedule = admin._schedule_graph_coloring(courses_df, students_df, rooms_df, constraints)
     elif algorithm == 'simulated_annealing':
         schedule = admin._schedule_simulated_annealing(courses_df, students_df, rooms_df, constraints)
+    elif algorithm == 'simulated_annealing_multistart':
+        schedule = admin._schedule_simulated_annealing_multistart(courses_df, students_df, rooms_df, constraints)
     elif algorithm == 'genetic':
         schedule = admin._schedule_genetic_algorithm(courses_df, students_df, rooms_df, constraints)
+    elif algorithm == 'genetic_parallel':
+        schedule = admin._schedule_genetic_parallel(courses_df, students_df, rooms_df, constraints)
+    elif algorithm == 'tabu':
+        schedule = admin._schedule_tabu_search(courses_df, students_df, rooms_df, constraints)
+    elif algorithm == 'cpsat':
+        if not ORTOOLS_AVAILABLE:
+            return jsonify({'error': 'OR-Tools is not installed on the server'}), 400
+        schedule = admin._schedule_ortools_two_phase(courses_df, students_df, rooms_df, constraints)
+        if schedule is None:
+            return jsonify({'error': 'No feasible schedule found', 'run_info': admin.last_run}), 422
+    elif algorithm == 'lns':
+        if not ORTOOLS_AVAILABLE:
+            return jsonify({'error': 'OR-Tools is not installed on the server'}), 400
+        schedule = admin._schedule_lns(courses_df, students_df, rooms_df, constraints)
+    elif algorithm == 'portfolio':
+        if data.get('stream'):
+            return _stream_portfolio(admin, courses_df, students_df, rooms_df, constraints)
+        schedule = admin._schedule_portfolio(courses_df, students_df, rooms_df, constraints)
+    elif algorithm == 'min_slots':
+        if not ORTOOLS_AVAILABLE:
+            return jsonify({'error': 'OR-Tools is not installed on the server'}), 400
+        schedule = admin._schedule_min_slots(courses_df, students_df, rooms_df, constraints)
+        if schedule is None:
+            return jsonify({'error': 'No feasible schedule found', 'run_info': admin.last_run}), 422
     else:
         return jsonify({'error': 'Invalid algorithm specified'}), 400
     
-    # Move current schedule to past_schedule if it exists
-    latest_schedule = collections['final_schedule'].find_one(
-        sort=[('created_at', -1)]
-    )
-    
-    if latest_schedule:
-        # Append to past_schedule instead of clearing it
-        collections['past_schedule'].insert_one({
-            'algorithm': latest_schedule.get('algorithm'),
-            'schedule': latest_schedule.get('schedule'),
-            'created_at': latest_schedule.get('created_at'),
-            'archived_at': datetime.utcnow()
-        })
-    
-    # Save new schedule
-    schedule_id = collections['final_schedule'].insert_one({
-        'algorithm': algorithm,
-        'schedule': schedule,
-        'created_at': datetime.utcnow()
-    }).inserted_id
+    # Move current schedule to past_schedule if it exists, then save the new one
+    schedule_id = _store_schedule(algorithm, schedule, admin.last_run)
     
     return jsonify({
         'message': 'Schedule generated successfully',
         'id': str(schedule_id),
-        'schedule': schedule
+        'schedule': schedule,
+        'run_info': admin.last_run
     }), 201
 
-@app.route('/api/schedules/conflicts', methods=['GET'])
+@app.route('/api/schedules/precheck', methods=['POST'])
 @handle_errors
-def get_conflicts():
-    students = list(collections['students'].find())
-    if not students:
-        return jsonify({'conflicts': []})
+def precheck_schedule():
+    """Feasibility report for all (or the selected) courses and the named algorithm, without running a solver"""
+    data = request.json or {}
+    course_codes = data.get('course_codes')
+    
+    if course_codes:
+        courses = list(collections['courses'].find({'course_code': {'$in': course_codes}}))
+        students = list(collections['students'].find({'course_code': {'$in': course_codes}}))
+    else:
+        courses = list(collections['courses'].find())
+        students = list(collections['students'].find())
+    rooms = list(collections['rooms'].find())
     
-    # Convert to DataFrame for conflict detection
-    students_df = pd.DataFrame(students)
+    if not courses or not rooms:
+        return jsonify({'error': 'Insufficient data for scheduling'}), 400
     
-    # Import conflict detection from original system
-    from app import AdminSection
+    # The pre-check reads no CSV files, so no CSV manager is needed
+    admin = AdminSection(csv_manager=None, conflict_graph=get_conflict_graph())
     
-    # Create temporary CSV manager
-    class ConflictCSVManager:
-        def __init__(self):
-            self.data = {'students.csv': students_df}
-            
-        def load_csv(self, filename):
-            return self.data.get(filename, pd.DataFrame())
-            return self.data.get(filename, pd.DataFrame())
+    constraints = data.get('constraints', {})
+    if 'start_date' in constraints and isinstance(constraints['start_date'], str):
+        constraints['start_date'] = datetime.strptime(constraints['start_date'], "%Y-%m-%d").date()
     
-    # Detect conflicts
-    class TempCSVManager(CSVManager):
-        def load_csv(self, filename):
-            if filename == 'students.csv':
-                return students_df
-            return pd.DataFrame()
-            
-    admin = AdminSection(csv_manager=TempCSVManager())
-    conflicts = admin.detect_conflicts()
+    report = admin._precheck(pd.DataFrame(courses), pd.DataFrame(students), pd.DataFrame(rooms), constraints,
+                             algorithm=data.get('algorithm'))
+    return jsonify(report)
+
+@app.route('/api/schedules/conflicts', methods=['GET'])
+@handle_errors
+def get_conflicts():
+    # Served from the maintained co-enrollment counts, no full recompute
+    conflicts = get_conflict_graph().graph()
+    if conflicts.num_edges == 0:
+        return jsonify({'conflicts': []})
     
-    return jsonify({'conflicts': conflicts})
+    course_names = {
+        course['course_code']: course.get('course_name', 'Unknown')
+        for course in collections['courses'].find({}, {'course_code': 1, 'course_name': 1})
+    }
+    
+    return jsonify({'conflicts': conflicts.to_records(course_names)})
 
 # Statistics endpoint
 @app.route('/api/statistics', methods=['GET'])
@@ -517,24 +708,21 @@ def get_exam_schedule():
 @app.route('/api/schedules/<course_code>/benches', methods=['GET'])
 @handle_errors
 def get_bench_assignments(course_code):
-    exams = list(collections['final_schedule'].find({'course_code': course_code}))
-    if not exams:
+    """Seat map of the benches a course's students sit on, built from the latest schedule"""
+    latest_schedule = collections['final_schedule'].find_one(sort=[('created_at', -1)])
+    schedule = latest_schedule.get('schedule') if latest_schedule else None
+    if not isinstance(schedule, list) or not any(exam.get('course_code') == course_code for exam in schedule):
         return jsonify({'error': 'Course not found in schedule'}), 404
-    # There should be only one exam per course_code
-    exam = exams[0]
-    benches = exam.get('benches', [])
-    # If benches is not JSON serializable, convert it
-    from bson import ObjectId
-    def make_json_serializable(obj):
-        if isinstance(obj, dict):
-            return {k: make_json_serializable(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [make_json_serializable(v) for v in obj]
-        elif isinstance(obj, ObjectId):
-            return str(obj)
-        else:
-            return obj
-    return jsonify({'benches': make_json_serializable(benches)})
+    bench_size = request.args.get('bench_size', BENCH_SIZE, type=int)
+    if bench_size < 1:
+        return jsonify({'error': 'bench_size must be at least 1'}), 400
+    # Rooms are shared, so the whole schedule is seated to place the course among its neighbours
+    benches = course_benches(seat_plan(schedule, bench_size), course_code)
+    return jsonify({
+        'course_code': course_code,
+        'students': sum(1 for bench in benches for seat in bench['seats'] if seat['course_code'] == course_code),
+        'benches': make_json_serializable(benches)
+    })
 
 @app.route('/api/login', methods=['POST'])
 @handle_errors
@@ -922,48 +1110,62 @@ def generate_selected_schedule():
             self.data[filename] = df
             return True
     
-    admin = AdminSection(csv_manager=TempCSVManager())
+    admin = AdminSection(csv_manager=TempCSVManager(), conflict_graph=get_conflict_graph())
     
     constraints = data.get('constraints', {})
     if 'start_date' in constraints and isinstance(constraints['start_date'], str):
         constraints['start_date'] = datetime.strptime(constraints['start_date'], "%Y-%m-%d").date()
     
+    # Reject inputs no solver can satisfy, unless the caller asks to run anyway
+    report = admin._precheck(courses_df, students_df, rooms_df, constraints, algorithm=algorithm)
+    if not report['feasible'] and not data.get('force'):
+        return jsonify({'error': 'Scheduling input is infeasible', 'precheck': report}), 422
+    
     # Generate schedule using selected algorithm
     if algorithm == 'graph_coloring':
         schedule = admin._schedule_graph_coloring(courses_df, students_df, rooms_df, constraints)
     elif algorithm == 'simulated_annealing':
         schedule = admin._schedule_simulated_annealing(courses_df, students_df, rooms_df, constraints)
+    elif algorithm == 'simulated_annealing_multistart':
+        schedule = admin._schedule_simulated_annealing_multistart(courses_df, students_df, rooms_df, constraints)
     elif algorithm == 'genetic':
         schedule = admin._schedule_genetic_algorithm(courses_df, students_df, rooms_df, constraints)
+    elif algorithm == 'genetic_parallel':
+        schedule = admin._schedule_genetic_parallel(courses_df, students_df, rooms_df, constraints)
+    elif algorithm == 'tabu':
+        schedule = admin._schedule_tabu_search(courses_df, students_df, rooms_df, constraints)
+    elif algorithm == 'cpsat':
+        if not ORTOOLS_AVAILABLE:
+            return jsonify({'error': 'OR-Tools is not installed on the server'}), 400
+        schedule = admin._schedule_ortools_two_phase(courses_df, students_df, rooms_df, constraints)
+        if schedule is None:
+            return jsonify({'error': 'No feasible schedule found', 'run_info': admin.last_run}), 422
+    elif algorithm == 'lns':
+        if not ORTOOLS_AVAILABLE:
+            return jsonify({'error': 'OR-Tools is not installed on the server'}), 400
+        schedule = admin._schedule_lns(courses_df, students_df, rooms_df, constraints)
+    elif algorithm == 'portfolio':
+        if data.get('stream'):
+            return _stream_portfolio(admin, courses_df, students_df, rooms_df, constraints,
+                                     selected_courses=course_codes)
+        schedule = admin._schedule_portfolio(courses_df, students_df, rooms_df, constraints)
+    elif algorithm == 'min_slots':
+        if not ORTOOLS_AVAILABLE:
+            return jsonify({'error': 'OR-Tools is not installed on the server'}), 400
+        schedule = admin._schedule_min_slots(courses_df, students_df, rooms_df, constraints)
+        if schedule is None:
+            return jsonify({'error': 'No feasible schedule found', 'run_info': admin.last_run}), 422
     else:
         return jsonify({'error': 'Invalid algorithm specified'}), 400
     
-    # Move current schedule to past_schedule if it exists
-    latest_schedule = collections['final_schedule'].find_one(
-        sort=[('created_at', -1)]
-    )
-    
-    if latest_schedule:
-        # Append to past_schedule instead of clearing it
-        collections['past_schedule'].insert_one({
-            'algorithm': latest_schedule.get('algorithm'),
-            'schedule': latest_schedule.get('schedule'),
-            'created_at': latest_schedule.get('created_at'),
-            'archived_at': datetime.utcnow()
-        })
-    
-    # Save new schedule
-    schedule_id = collections['final_schedule'].insert_one({
-        'algorithm': algorithm,
-        'schedule': schedule,
-        'created_at': datetime.utcnow(),
-        'selected_courses': course_codes
-    }).inserted_id
+    # Move current schedule to past_schedule if it exists, then save the new one
+    schedule_id = _store_schedule(algorithm, schedule, admin.last_run, selected_courses=course_codes)
     
     return jsonify({
         'message': 'Schedule generated successfully',
         'id': str(schedule_id),
-        'schedule': schedule
+        'schedule': schedule,
+        'run_info': admin.last_run
     }), 201
 
 @app.route('/api/schedules/past', methods=['GET'])
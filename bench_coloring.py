@@ -0,0 +1,107 @@
+"""Benchmark coloring.dsatur against the argmax DSATUR it replaced and NetworkX greedy coloring.
+
+Graphs are random conflict graphs from a fixed seed, so runs are repeatable:
+
+    python bench_coloring.py                  # the default sizes below
+    python bench_coloring.py 5000 385000      # one graph: courses, conflict pairs
+"""
+import sys
+import time
+
+import numpy as np
+
+from coloring import dsatur
+
+try:
+    import networkx as nx
+    NETWORKX_AVAILABLE = True
+except ImportError:
+    NETWORKX_AVAILABLE = False
+
+# (courses, conflict pairs drawn before de-duplication)
+SIZES = [(5000, 385000), (20000, 200000), (50000, 500000), (100000, 1000000)]
+SEED = 0
+
+
+def random_graph(n, pairs, seed=SEED):
+    """CSR adjacency (indptr, indices) of a random simple graph on n vertices"""
+    rng = np.random.default_rng(seed)
+    u = rng.integers(0, n, pairs)
+    v = rng.integers(0, n, pairs)
+    keep = u != v
+    edges = np.unique(np.sort(np.stack((u[keep], v[keep]), axis=1), axis=1), axis=0)
+    rows = np.concatenate((edges[:, 0], edges[:, 1]))
+    cols = np.concatenate((edges[:, 1], edges[:, 0]))
+    order = np.argsort(rows, kind='stable')
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n))))
+    return indptr, cols[order], edges
+
+
+def argmax_dsatur(indptr, indices):
+    """The previous dsatur: a packed saturation/degree key per course and a full argmax per step"""
+    n = len(indptr) - 1
+    colors = np.full(n, -1, dtype=np.int64)
+    if n == 0:
+        return colors
+    degree = np.diff(indptr)
+    scale = int(degree.max()) + 1
+    key = degree.copy()
+    done = np.iinfo(np.int64).min // 2
+    seen = np.zeros((n, 64), dtype=bool)
+    n_colors = 0
+    for _ in range(n):
+        v = int(np.argmax(key))
+        color = int(np.argmin(seen[v, :n_colors + 1]))
+        if color == n_colors:
+            n_colors += 1
+            if n_colors + 1 > seen.shape[1]:
+                seen = np.concatenate((seen, np.zeros_like(seen)), axis=1)
+        colors[v] = color
+        key[v] = done
+        nbrs = indices[indptr[v]:indptr[v + 1]]
+        nbrs = nbrs[colors[nbrs] < 0]
+        key[nbrs] -= 1
+        fresh = nbrs[~seen[nbrs, color]]
+        seen[fresh, color] = True
+        key[fresh] += scale
+    return colors
+
+
+def networkx_greedy(n, edges):
+    """Build the NetworkX graph and color it largest-first, as the scheduler used to"""
+    graph = nx.Graph()
+    graph.add_nodes_from(range(n))
+    graph.add_edges_from(edges.tolist())
+    coloring = nx.greedy_color(graph, strategy='largest_first')
+    return np.asarray([coloring[v] for v in range(n)])
+
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    colors = function(*args)
+    return time.perf_counter() - started, colors
+
+
+def _check(colors, edges):
+    assert (colors >= 0).all() and (colors[edges[:, 0]] != colors[edges[:, 1]]).all(), "invalid coloring"
+    return int(colors.max(initial=-1)) + 1
+
+
+def run(n, pairs):
+    indptr, indices, edges = random_graph(n, pairs)
+    print(f"\n📊 {n} courses, {len(edges)} conflicting pairs (time relative to the bucket queue)")
+    runs = [('dsatur (bucket queue)', dsatur, (indptr, indices)),
+            ('dsatur (argmax, previous)', argmax_dsatur, (indptr, indices))]
+    if NETWORKX_AVAILABLE:
+        runs.append(('networkx build + greedy_color', networkx_greedy, (n, edges)))
+    baseline = None
+    for name, function, args in runs:
+        elapsed, colors = _timed(function, *args)
+        baseline = baseline or elapsed
+        print(f"   {name:<30} {elapsed:8.3f}s  {_check(colors, edges):>4} colors  {elapsed / baseline:6.1f}x")
+
+
+if __name__ == '__main__':
+    sizes = [(int(sys.argv[1]), int(sys.argv[2]))] if len(sys.argv) > 2 else SIZES
+    for n, pairs in sizes:
+        run(n, pairs)
@@ -0,0 +1,232 @@
+import heapq
+import random
+import time
+
+import numpy as np
+
+
+def clique_lower_bound(neighbors, starts=256, with_members=False):
+    """Size of a large clique in the conflict graph (a lower bound on exam slots).
+
+    Greedy clique growth from the `starts` highest-degree courses. Courses are
+    relabelled by degree rank and adjacency is held as integer bitsets, so the
+    next candidate (the highest-degree common neighbour) is the lowest set bit.
+    `neighbors` is a per-course list of conflicting course ids. With
+    `with_members` returns (size, course ids of the clique).
+    """
+    n = len(neighbors)
+    if n == 0:
+        return (0, []) if with_members else 0
+    order = sorted(range(n), key=lambda c: -len(neighbors[c]))
+    rank = [0] * n
+    for i, c in enumerate(order):
+        rank[c] = i
+    bits = [0] * n
+    for c in range(n):
+        mask = 0
+        for nb in neighbors[c]:
+            mask |= 1 << rank[nb]
+        bits[rank[c]] = mask
+
+    best, members = 1, [0]
+    for v in range(min(starts, n)):
+        # No clique through v can beat the current best
+        if bits[v].bit_count() + 1 <= best:
+            continue
+        clique, candidates = [v], bits[v]
+        while candidates:
+            u = (candidates & -candidates).bit_length() - 1
+            clique.append(u)
+            candidates &= bits[u]
+        if len(clique) > best:
+            best, members = len(clique), clique
+    return (best, [order[i] for i in members]) if with_members else best
+
+
+def dsatur(indptr, indices):
+    """DSATUR coloring of a CSR adjacency; returns an int array of colors (slots).
+
+    Each step colors the uncolored course with the most distinct neighbour
+    colors (saturation), breaking ties by uncolored degree and then by
+    lowest id, with the smallest color its neighbours do not use. Neighbour
+    colors are per-course integer bitsets. The queue holds one heap of
+    (uncolored degree, course) keys per saturation level, with lazy deletion: a
+    course is pushed again only when its saturation rises, and an entry
+    whose degree has since dropped is re-pushed when it reaches the top
+    (degrees only fall, so the top is never understated). The run is
+    O((V + E) log V) instead of an argmax over every course per step.
+    """
+    indptr = np.asarray(indptr, dtype=np.int64)
+    n = len(indptr) - 1
+    if n <= 0:
+        return np.full(0, -1, dtype=np.int64)
+    neighbors = np.asarray(indices, dtype=np.int64).tolist()
+    bounds = indptr.tolist()
+    degree = np.diff(indptr).tolist()
+    colors = [-1] * n
+    saturation = [0] * n
+    used = [0] * n
+    # buckets[s] holds courses of saturation s as packed keys -degree * n + course,
+    # so the heap minimum has the highest degree and then the lowest id
+    buckets = [[v - d * n for v, d in enumerate(degree)], []]
+    heapq.heapify(buckets[0])
+    top = 0
+    push, pop = heapq.heappush, heapq.heappop
+
+    for _ in range(n):
+        while True:
+            bucket = buckets[top]
+            if not bucket:
+                top -= 1
+                continue
+            key = pop(bucket)
+            v = key % n
+            if colors[v] >= 0 or saturation[v] != top:
+                continue
+            if key != v - degree[v] * n:
+                push(bucket, v - degree[v] * n)
+                continue
+            break
+
+        # Lowest bit not set in v's neighbour colors
+        mask = used[v]
+        color = (~mask & (mask + 1)).bit_length() - 1
+        if color == len(buckets) - 1:
+            buckets.append([])
+        colors[v] = color
+        bit = 1 << color
+        for u in neighbors[bounds[v]:bounds[v + 1]]:
+            if colors[u] < 0:
+                degree[u] -= 1
+                if not used[u] & bit:
+                    used[u] |= bit
+                    level = saturation[u] + 1
+                    saturation[u] = level
+                    push(buckets[level], u - degree[u] * n)
+                    if level > top:
+                        top = level
+    return np.asarray(colors, dtype=np.int64)
+
+
+def _first_fit(neighbors, order, n):
+    """Greedy coloring in the given order, each course taking its smallest free color"""
+    colors = [-1] * n
+    for v in order:
+        used = {colors[u] for u in neighbors[v]}
+        color = 0
+        while color in used:
+            color += 1
+        colors[v] = color
+    return colors
+
+
+def _kempe_chain(neighbors, colors, seeds, a, b, forbidden):
+    """Courses reachable from `seeds` through courses colored a or b.
+
+    Returns None as soon as the chain reaches a course in `forbidden`.
+    """
+    chain = set(seeds)
+    stack = list(seeds)
+    while stack:
+        v = stack.pop()
+        for u in neighbors[v]:
+            if u not in chain and colors[u] in (a, b):
+                if u in forbidden:
+                    return None
+                chain.add(u)
+                stack.append(u)
+    return chain
+
+
+def _empty_color(neighbors, colors, target, n_colors, deadline):
+    """Try to move every course out of color `target` by recoloring or Kempe swaps.
+
+    Moves are applied as they are found and always keep the coloring valid, so
+    a partial success still shrinks the class. Returns (emptied, swaps).
+    """
+    swaps = 0
+    for v in [c for c, color in enumerate(colors) if color == target]:
+        if time.time() >= deadline:
+            return False, swaps
+        by_color = {}
+        for u in neighbors[v]:
+            by_color.setdefault(colors[u], []).append(u)
+        others = [a for a in range(n_colors) if a != target]
+        # Plain recoloring first, then interchange an (a, b) Kempe chain that
+        # frees color a around v without pulling a b-colored neighbour into a
+        moved = next((a for a in others if a not in by_color), None)
+        if moved is None:
+            for a in sorted(others, key=lambda a: len(by_color[a])):
+                for b in others:
+                    if b == a:
+                        continue
+                    if time.time() >= deadline:
+                        return False, swaps
+                    chain = _kempe_chain(neighbors, colors, by_color[a], a, b, set(by_color.get(b, ())))
+                    if chain is None:
+                        continue
+                    for u in chain:
+                        colors[u] = b if colors[u] == a else a
+                    swaps += 1
+                    moved = a
+                    break
+                if moved is not None:
+                    break
+        if moved is None:
+            return False, swaps
+        colors[v] = moved
+    return True, swaps
+
+
+def squeeze_coloring(neighbors, colors, time_budget=2.0, seed=None, lower_bound=None):
+    """Post-optimize a coloring to remove whole colors (exam slots) within a time budget.
+
+    Alternates iterated greedy passes (Culberson: recolor first-fit with the
+    color classes kept contiguous but reordered, which never adds a color)
+    with Kempe-chain moves that try to empty the smallest class. Stops early
+    once `lower_bound` colors are reached (defaults to clique_lower_bound).
+    Returns the improved colors and stats including how many were removed.
+    """
+    started = time.time()
+    deadline = started + time_budget
+    rng = random.Random(seed)
+    n = len(neighbors)
+    best = list(colors)
+    before = max(best, default=-1) + 1
+    stats = {'colors_before': before, 'iterations': 0, 'kempe_swaps': 0}
+    if lower_bound is None:
+        lower_bound = clique_lower_bound(neighbors)
+
+    while n and max(best) + 1 > lower_bound and time.time() < deadline:
+        n_colors = max(best) + 1
+        classes = [[] for _ in range(n_colors)]
+        for v, color in enumerate(best):
+            classes[color].append(v)
+
+        # Iterated greedy, cycling reverse / largest-first / random class orders
+        strategy = stats['iterations'] % 3
+        if strategy == 0:
+            classes.reverse()
+        elif strategy == 1:
+            classes.sort(key=len, reverse=True)
+        else:
+            rng.shuffle(classes)
+        candidate = _first_fit(neighbors, [v for cls in classes for v in cls], n)
+        stats['iterations'] += 1
+
+        # Kempe moves on the smallest class; relabel so colors stay 0..k-1
+        n_colors = max(candidate) + 1
+        sizes = [0] * n_colors
+        for color in candidate:
+            sizes[color] += 1
+        target = min(range(n_colors), key=sizes.__getitem__)
+        emptied, swaps = _empty_color(neighbors, candidate, target, n_colors, deadline)
+        stats['kempe_swaps'] += swaps
+        if emptied:
+            candidate = [color - (color > target) for color in candidate]
+        best = candidate
+
+    stats['colors_after'] = max(best, default=-1) + 1
+    stats['slots_removed'] = before - stats['colors_after']
+    stats['elapsed'] = round(time.time() - started, 3)
+    return best, stats
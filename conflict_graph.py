@@ -0,0 +1,270 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class ConflictGraph:
+    """Weighted course conflict graph built from a sparse co-enrollment product"""
+
+    def __init__(self, course_codes, co_enrollment, enrollment_counts=None, incidence=None, student_ids=None):
+        self.course_codes = list(course_codes)
+        self.course_index = {code: i for i, code in enumerate(self.course_codes)}
+
+        # Off-diagonal entries hold shared-student counts; the diagonal is
+        # split off into enrollment_counts so the matrix is a pure adjacency
+        matrix = sparse.csr_matrix(co_enrollment, dtype=np.int64)
+        if enrollment_counts is None:
+            enrollment_counts = matrix.diagonal()
+        matrix.setdiag(0)
+        matrix.eliminate_zeros()
+        matrix.sort_indices()
+        self.matrix = matrix
+        self.enrollment_counts = np.asarray(enrollment_counts, dtype=np.int64)
+
+        # Student x course incidence (CSC), kept for roster queries
+        self.incidence = incidence
+        self.student_ids = list(student_ids) if student_ids is not None else []
+
+    @classmethod
+    def from_enrollments(cls, students_df, course_codes=None):
+        """Build the graph from a students DataFrame (student_id, course_code).
+
+        If course_codes is given, nodes follow that order and enrollments in
+        other courses are ignored; otherwise every enrolled course is a node.
+        """
+        codes = list(pd.unique(pd.Series(course_codes, dtype=object))) if course_codes is not None else []
+        if students_df is None or students_df.empty or not {'student_id', 'course_code'} <= set(students_df.columns):
+            n = len(codes)
+            return cls(codes, sparse.csr_matrix((n, n), dtype=np.int64), np.zeros(n, dtype=np.int64))
+
+        pairs = students_df[['student_id', 'course_code']].dropna().drop_duplicates()
+        if course_codes is None:
+            codes = list(pd.unique(pairs['course_code']))
+        else:
+            pairs = pairs[pairs['course_code'].isin(codes)]
+
+        course_codes_int = pd.Categorical(pairs['course_code'], categories=codes).codes
+        student_codes, student_ids = pd.factorize(pairs['student_id'])
+        n_students, n_courses = len(student_ids), len(codes)
+
+        incidence = sparse.csr_matrix(
+            (np.ones(len(pairs), dtype=np.int64), (student_codes, course_codes_int)),
+            shape=(n_students, n_courses)
+        )
+        # One sparse product gives every pairwise shared-student count,
+        # with per-course enrollment on the diagonal
+        co_enrollment = (incidence.T @ incidence).tocsr()
+        return cls(codes, co_enrollment, co_enrollment.diagonal(), incidence.tocsc(), student_ids)
+
+    @classmethod
+    def from_pair_counts(cls, pair_counts, enrollment_counts, course_codes=None):
+        """Build the graph from {(course1, course2): shared} and {course: enrolled} maps"""
+        if course_codes is None:
+            codes = list(enrollment_counts)
+            seen = set(codes)
+            for pair in pair_counts:
+                for code in pair:
+                    if code not in seen:
+                        seen.add(code)
+                        codes.append(code)
+        else:
+            codes = list(course_codes)
+        index = {code: i for i, code in enumerate(codes)}
+        n = len(codes)
+
+        rows, cols, data = [], [], []
+        for (course1, course2), shared in pair_counts.items():
+            i, j = index.get(course1), index.get(course2)
+            if i is None or j is None or shared <= 0:
+                continue
+            rows.extend((i, j))
+            cols.extend((j, i))
+            data.extend((shared, shared))
+        matrix = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.int64), (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+            shape=(n, n)
+        )
+        counts = np.array([enrollment_counts.get(code, 0) for code in codes], dtype=np.int64)
+        return cls(codes, matrix, counts)
+
+    def subgraph(self, course_codes):
+        """Graph restricted to (and ordered by) course_codes; unknown codes become isolated nodes"""
+        codes = list(pd.unique(pd.Series(course_codes, dtype=object)))
+        old = np.array([self.course_index.get(code, -1) for code in codes], dtype=np.int64)
+        present = np.flatnonzero(old >= 0)
+        # Selection matrix P (new x old) so that P M P^T is the induced subgraph
+        select = sparse.csr_matrix(
+            (np.ones(len(present), dtype=np.int64), (present, old[present])),
+            shape=(len(codes), len(self.course_codes))
+        )
+        counts = np.zeros(len(codes), dtype=np.int64)
+        counts[present] = self.enrollment_counts[old[present]]
+        incidence = (self.incidence @ select.T).tocsc() if self.incidence is not None else None
+        return ConflictGraph(codes, select @ self.matrix @ select.T, counts, incidence, self.student_ids)
+
+    def __len__(self):
+        return len(self.course_codes)
+
+    def __contains__(self, course_code):
+        return course_code in self.course_index
+
+    @property
+    def num_edges(self):
+        return self.matrix.nnz // 2
+
+    def degree(self):
+        """Number of conflicting courses per course, in node order"""
+        return np.diff(self.matrix.indptr)
+
+    def neighbor_lists(self):
+        """Per-course lists of conflicting course indices, in node order"""
+        indptr, indices = self.matrix.indptr, self.matrix.indices.tolist()
+        return [indices[indptr[i]:indptr[i + 1]] for i in range(len(self.course_codes))]
+
+    def neighbors(self, course_code):
+        """Map of conflicting course code -> shared student count"""
+        i = self.course_index.get(course_code)
+        if i is None:
+            return {}
+        start, end = self.matrix.indptr[i], self.matrix.indptr[i + 1]
+        return {
+            self.course_codes[j]: int(w)
+            for j, w in zip(self.matrix.indices[start:end], self.matrix.data[start:end])
+        }
+
+    def weight(self, course1, course2):
+        """Shared student count between two courses (0 if no conflict)"""
+        i, j = self.course_index.get(course1), self.course_index.get(course2)
+        if i is None or j is None:
+            return 0
+        return int(self.matrix[i, j])
+
+    def edge_arrays(self):
+        """Return (u, v, w) integer arrays of each conflict edge with u < v"""
+        upper = sparse.triu(self.matrix, k=1).tocoo()
+        return upper.row.astype(np.int64), upper.col.astype(np.int64), upper.data.astype(np.int64)
+
+    def edges(self):
+        """Yield (course1, course2, shared_students) once per conflict pair"""
+        u, v, w = self.edge_arrays()
+        for i, j, weight in zip(u.tolist(), v.tolist(), w.tolist()):
+            yield self.course_codes[i], self.course_codes[j], weight
+
+    def adjacency(self):
+        """Legacy dict-of-sets view: course code -> set of conflicting codes"""
+        indptr, indices = self.matrix.indptr, self.matrix.indices
+        return {
+            code: {self.course_codes[j] for j in indices[indptr[i]:indptr[i + 1]]}
+            for i, code in enumerate(self.course_codes)
+            if indptr[i + 1] > indptr[i]
+        }
+
+    def shared_students(self, course1, course2):
+        """Student IDs enrolled in both courses"""
+        if self.incidence is None:
+            return []
+        i, j = self.course_index.get(course1), self.course_index.get(course2)
+        if i is None or j is None:
+            return []
+        col = self.incidence.indptr
+        rows_i = self.incidence.indices[col[i]:col[i + 1]]
+        rows_j = self.incidence.indices[col[j]:col[j + 1]]
+        return [self.student_ids[s] for s in np.intersect1d(rows_i, rows_j)]
+
+    def to_records(self, course_names=None):
+        """JSON-serializable conflict list, heaviest pairs first"""
+        course_names = course_names or {}
+        records = []
+        for course1, course2, shared in self.edges():
+            records.append({
+                'type': 'student',
+                'course1': course1,
+                'course2': course2,
+                'course1_name': course_names.get(course1, 'Unknown'),
+                'course2_name': course_names.get(course2, 'Unknown'),
+                'shared_students': shared,
+                'details': f"{shared} student(s) enrolled in both {course1} and {course2}"
+            })
+        records.sort(key=lambda r: r['shared_students'], reverse=True)
+        return records
+
+
+def pair_key(course1, course2):
+    """Canonical (ordered) key for an undirected course pair"""
+    return (course1, course2) if str(course1) <= str(course2) else (course2, course1)
+
+
+class IncrementalConflictGraph:
+    """Versioned co-enrollment counts maintained on enroll/unenroll.
+
+    Updates and snapshot builds hold a lock, so a threaded server can apply
+    an enrollment while another request takes a snapshot.
+    """
+
+    def __init__(self, pair_counts=None, enrollment_counts=None, version=0):
+        self.pair_counts = dict(pair_counts or {})
+        self.enrollment_counts = dict(enrollment_counts or {})
+        self.version = version
+        self._snapshot = None
+        self._snapshot_version = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_enrollments(cls, students_df, version=0):
+        """Bootstrap the counts with a single full sparse build"""
+        graph = ConflictGraph.from_enrollments(students_df)
+        pair_counts = {pair_key(c1, c2): shared for c1, c2, shared in graph.edges()}
+        enrollment_counts = dict(zip(graph.course_codes, graph.enrollment_counts.tolist()))
+        return cls(pair_counts, enrollment_counts, version)
+
+    def add_enrollment(self, course_code, other_courses):
+        """Record a student joining course_code while enrolled in other_courses"""
+        self._apply(course_code, other_courses, 1)
+
+    def remove_enrollment(self, course_code, other_courses):
+        """Record a student leaving course_code while still enrolled in other_courses"""
+        self._apply(course_code, other_courses, -1)
+
+    def _apply(self, course_code, other_courses, delta):
+        with self._lock:
+            self._apply_locked(course_code, other_courses, delta)
+
+    def _apply_locked(self, course_code, other_courses, delta):
+        self.enrollment_counts[course_code] = self.enrollment_counts.get(course_code, 0) + delta
+        if self.enrollment_counts[course_code] <= 0:
+            del self.enrollment_counts[course_code]
+        for other in set(other_courses) - {course_code}:
+            key = pair_key(course_code, other)
+            count = self.pair_counts.get(key, 0) + delta
+            if count > 0:
+                self.pair_counts[key] = count
+            else:
+                self.pair_counts.pop(key, None)
+        self.version += 1
+
+    def graph(self):
+        """ConflictGraph snapshot for the current version (cached until the next update)"""
+        with self._lock:
+            if self._snapshot is None or self._snapshot_version != self.version:
+                self._snapshot = ConflictGraph.from_pair_counts(self.pair_counts, self.enrollment_counts)
+                self._snapshot_version = self.version
+            return self._snapshot
+
+    def to_dict(self):
+        """JSON-serializable form"""
+        with self._lock:
+            return {
+                'version': self.version,
+                'enrollment_counts': [[code, count] for code, count in self.enrollment_counts.items()],
+                'pair_counts': [[c1, c2, count] for (c1, c2), count in self.pair_counts.items()]
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            {(c1, c2): count for c1, c2, count in data.get('pair_counts', [])},
+            {code: count for code, count in data.get('enrollment_counts', [])},
+            data.get('version', 0)
+        )
@@ -0,0 +1,503 @@
+import math
+import time
+
+import numpy as np
+
+from coloring import clique_lower_bound
+from room_packing import pack_shared, rooms_needed
+
+try:
+    from ortools.sat.python import cp_model
+    ORTOOLS_AVAILABLE = True
+except ImportError:
+    ORTOOLS_AVAILABLE = False
+
+# Default wall-clock limit (seconds) so a solve never ties up a worker indefinitely
+DEFAULT_TIME_LIMIT = 60
+
+
+def _configure(solver, max_time_in_seconds=None, num_search_workers=None):
+    if max_time_in_seconds:
+        solver.parameters.max_time_in_seconds = float(max_time_in_seconds)
+    if num_search_workers:
+        solver.parameters.num_search_workers = int(num_search_workers)
+
+
+def _gap(objective, bound, optimal=False):
+    """Relative optimality gap of a minimisation result; 0 when it was proven optimal"""
+    if objective is None or bound is None:
+        return None
+    if optimal:
+        return 0.0
+    return round(abs(objective - bound) / max(1, abs(objective)), 4)
+
+
+def oversized_courses(instance):
+    """Course ids that cannot be seated: larger than every room, or than all rooms together when split"""
+    if not instance.n_rooms:
+        return list(range(instance.n_courses))
+    limit = instance.room_capacity.sum() if instance.split_courses else instance.room_capacity.max()
+    return np.flatnonzero(instance.enrollment > limit).tolist()
+
+
+def split_courses(instance):
+    """Course ids larger than every room, which take several rooms when splitting is on"""
+    if not instance.split_courses or not instance.n_rooms:
+        return []
+    return np.flatnonzero(instance.enrollment > instance.room_capacity.max()).tolist()
+
+
+def capacity_levels(instance):
+    """Per capacity level k: (k, courses over k the rooms can hold, per-course demand on them).
+
+    With exclusive rooms a room holds one course, so a course over k needs
+    one of the rooms over k (level -1 for 'any course') and a split course
+    (when splitting is on) the largest rooms_needed of them. With room
+    sharing a room of c seats holds at most c // (k + 1) courses over k; the
+    levels are the room capacities and their halves and thirds, where those
+    counts drop. Split courses are then left to seat_levels.
+    """
+    levels = []
+    if instance.room_sharing:
+        split = np.zeros(instance.n_courses, dtype=bool)
+        split[split_courses(instance)] = True
+        for level in sorted({cap // parts for cap in set(instance.room_capacity.tolist()) for parts in (1, 2, 3)}):
+            fits = int((instance.room_capacity // (level + 1)).sum())
+            demand = ((instance.enrollment > level) & ~split).astype(np.int64)
+            levels.append((level, fits, demand))
+        return levels
+
+    needed = rooms_needed(instance.enrollment, instance.room_capacity)
+    if not instance.split_courses:
+        needed = np.ones_like(needed)
+    for level in [-1] + sorted(set(instance.room_capacity.tolist())):
+        rooms_above = int((instance.room_capacity > level).sum())
+        demand = np.where(instance.enrollment > level, np.minimum(needed, rooms_above), 0)
+        levels.append((level, rooms_above, demand))
+    return levels
+
+
+def seat_levels(instance):
+    """With room sharing, per capacity level k plus -1: (k, seats over k, per-course students bound to them).
+
+    The students of a course over k must sit in rooms over k, while a split
+    course is only bound by all the seats together (level -1). Empty with
+    exclusive rooms, where capacity_levels already implies the seats.
+    """
+    if not instance.room_sharing:
+        return []
+    split = np.zeros(instance.n_courses, dtype=bool)
+    split[split_courses(instance)] = True
+    levels = []
+    for level in [-1] + sorted(set(instance.room_capacity.tolist())):
+        seats_above = int(instance.room_capacity[instance.room_capacity > level].sum())
+        confined = instance.enrollment > level
+        if level >= 0:
+            confined &= ~split
+        demand = np.where(confined, np.minimum(instance.enrollment, seats_above), 0)
+        levels.append((level, seats_above, demand))
+    return levels
+
+
+def room_lower_bound(instance):
+    """Fewest slots the rooms allow: per capacity and seat level k, demand over k / capacity over k.
+
+    With room sharing level -1 of the seat levels is total students / total
+    seats, tightened at the levels large courses are confined to.
+    """
+    bound = 0
+    for _, capacity, demand in capacity_levels(instance) + seat_levels(instance):
+        if capacity:
+            bound = max(bound, math.ceil(int(demand.sum()) / capacity))
+    return bound
+
+
+def solve_slot_assignment(instance, max_time_in_seconds=None, num_search_workers=None, hint=None,
+                          minimize_span=True):
+    """Phase 1: assign every course to a slot, using as few leading slots as possible.
+
+    One BoolVar per (course, slot) the instructor can attend. Conflicting
+    courses never share a slot, and each slot must respect every capacity
+    level k of capacity_levels and seat_levels. With exclusive rooms,
+    courses with more than k students may not outnumber rooms with more
+    than k seats (Hall's condition for nested capacity sets), which makes
+    phase 2 always feasible; a course split across rooms counts once per
+    room it needs above k. With room sharing, courses over k may not
+    outnumber what the rooms can hold of them, nor their students the seats
+    of rooms over k, so no slot asks the packer for more than its rooms fit.
+
+    `hint` optionally maps course ids to a starting slot (e.g. a greedy
+    coloring); courses whose hinted slot is out of range or blocked are left
+    unhinted. With `minimize_span=False` the model is a pure feasibility check.
+    """
+    started = time.time()
+    model = cp_model.CpModel()
+    n_courses, n_slots = instance.n_courses, instance.n_slots
+
+    y = {}
+    course_vars = [[] for _ in range(n_courses)]
+    for c in range(n_courses):
+        for t in range(n_slots):
+            if not instance.absent[c, t]:
+                y[(c, t)] = model.NewBoolVar(f'y_{c}_{t}')
+                course_vars[c].append(y[(c, t)])
+
+    # Each course gets exactly one slot
+    for c in range(n_courses):
+        model.AddExactlyOne(course_vars[c])
+
+    # Conflicting courses take different slots
+    for u, v in zip(instance.edge_u.tolist(), instance.edge_v.tolist()):
+        for t in range(n_slots):
+            if (u, t) in y and (v, t) in y:
+                model.AddAtMostOne([y[(u, t)], y[(v, t)]])
+
+    # Room capacity per slot, one threshold constraint per capacity and seat level
+    for _, capacity, demand in capacity_levels(instance) + seat_levels(instance):
+        courses_above = np.flatnonzero(demand).tolist()
+        if int(demand.sum()) <= capacity:
+            continue
+        weights = demand.tolist()
+        for t in range(n_slots):
+            slot_terms = [(weights[c], y[(c, t)]) for c in courses_above if (c, t) in y]
+            if sum(weight for weight, _ in slot_terms) > capacity:
+                model.Add(sum(weight * var for weight, var in slot_terms) <= capacity)
+
+    # Objective: exam span. used[t] covers every course in slot t and the
+    # used slots form a prefix, so sum(used) is the index of the last slot + 1
+    if minimize_span:
+        used = [model.NewBoolVar(f'used_{t}') for t in range(n_slots)]
+        for (c, t), var in y.items():
+            model.AddImplication(var, used[t])
+        for t in range(n_slots - 1):
+            model.AddImplication(used[t + 1], used[t])
+        model.Minimize(sum(used))
+
+    hinted = {c: t for c, t in (hint or {}).items() if (c, t) in y}
+    if hinted:
+        for (c, t), var in y.items():
+            if c in hinted:
+                model.AddHint(var, hinted[c] == t)
+        if minimize_span and len(hinted) == n_courses:
+            span = max(hinted.values(), default=-1) + 1
+            for t in range(n_slots):
+                model.AddHint(used[t], t < span)
+
+    solver = cp_model.CpSolver()
+    _configure(solver, max_time_in_seconds, num_search_workers)
+    status = solver.Solve(model)
+
+    result = {
+        'status': solver.StatusName(status),
+        'variables': len(y),
+        'hinted': len(hinted),
+        'objective': None,
+        'bound': None,
+        'gap': None,
+        'wall_time': round(time.time() - started, 3),
+        'slots': None
+    }
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) and minimize_span:
+        result['objective'] = int(round(solver.ObjectiveValue()))
+        result['bound'] = int(round(solver.BestObjectiveBound()))
+        result['gap'] = _gap(result['objective'], result['bound'], status == cp_model.OPTIMAL)
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        slots = [0] * n_courses
+        for (c, t), var in y.items():
+            if solver.Value(var):
+                slots[c] = t
+        result['slots'] = slots
+    return result
+
+
+def solve_room_assignment(instance, courses, max_time_in_seconds=None, num_search_workers=None, excluded=None):
+    """Phase 2: give each course of one slot its own room, minimising empty seats.
+
+    Rooms in `excluded` (already taken by split courses) are not offered.
+    """
+    model = cp_model.CpModel()
+    x = {}
+    room_vars = [[] for _ in range(instance.n_rooms)]
+    waste = []
+    available = np.ones(instance.n_rooms, dtype=bool)
+    available[list(excluded or [])] = False
+    for c in courses:
+        fitting = np.flatnonzero(available & (instance.room_capacity >= instance.enrollment[c])).tolist()
+        options = []
+        for r in fitting:
+            var = model.NewBoolVar(f'x_{c}_{r}')
+            x[(c, r)] = var
+            options.append(var)
+            room_vars[r].append(var)
+            waste.append(int(instance.room_capacity[r] - instance.enrollment[c]) * var)
+        model.AddExactlyOne(options)
+    for variables in room_vars:
+        if len(variables) > 1:
+            model.AddAtMostOne(variables)
+    model.Minimize(sum(waste))
+
+    solver = cp_model.CpSolver()
+    _configure(solver, max_time_in_seconds, num_search_workers)
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None, {'status': solver.StatusName(status)}
+    rooms = {}
+    for (c, r), var in x.items():
+        if solver.Value(var):
+            rooms[c] = r
+    return rooms, {
+        'status': solver.StatusName(status),
+        'objective': int(round(solver.ObjectiveValue())),
+        'bound': int(round(solver.BestObjectiveBound()))
+    }
+
+
+def _oversized_result(instance, too_big):
+    return {
+        'status': 'INFEASIBLE',
+        'reason': f"{len(too_big)} course(s) exceed the "
+                  + ("total room capacity: " if instance.split_courses else "largest room: ")
+                  + ', '.join(instance.course_codes[c] for c in too_big[:10]),
+        'slots': None,
+        'rooms': None
+    }
+
+
+def assign_rooms(instance, slots, deadline=None, num_search_workers=None):
+    """Phase 2 over every used slot; returns (rooms, stats), rooms None on failure.
+
+    Split courses take the largest rooms of their slot first (their first
+    room is reported); the other courses are matched to the rest.
+    """
+    by_slot = [[] for _ in range(instance.n_slots)]
+    for c, t in enumerate(slots):
+        by_slot[t].append(c)
+    split = set(split_courses(instance))
+    largest_first = np.argsort(-instance.room_capacity, kind='stable').tolist()
+
+    started = time.time()
+    rooms = [0] * instance.n_courses
+    pending = sum(1 for courses in by_slot if courses)
+    stats = {'slots_solved': pending, 'wasted_seats': 0, 'bound': 0}
+    optimal = True
+    for t, courses in enumerate(by_slot):
+        if not courses:
+            continue
+        # Phase 2 models are tiny; never starve them even if phase 1 used the budget
+        limit = max(1.0, (deadline - time.time()) / pending) if deadline else None
+        excluded = []
+        for c in sorted((c for c in courses if c in split), key=lambda c: -instance.enrollment[c]):
+            rooms[c] = largest_first[len(excluded)]
+            seats = 0
+            while seats < instance.enrollment[c] and len(excluded) < instance.n_rooms:
+                seats += int(instance.room_capacity[largest_first[len(excluded)]])
+                excluded.append(largest_first[len(excluded)])
+        courses = [c for c in courses if c not in split]
+        assignment, slot_stats = solve_room_assignment(instance, courses, limit, num_search_workers, excluded)
+        pending -= 1
+        if assignment is None:
+            return None, {'status': slot_stats['status'], 'reason': f"room assignment failed for slot {t}"}
+        for c, r in assignment.items():
+            rooms[c] = r
+        optimal = optimal and slot_stats['status'] == 'OPTIMAL'
+        stats['wasted_seats'] += slot_stats['objective']
+        stats['bound'] += slot_stats['bound']
+
+    stats['optimal'] = optimal
+    stats['gap'] = _gap(stats['wasted_seats'], stats['bound'], optimal)
+    stats['wall_time'] = round(time.time() - started, 3)
+    return rooms, stats
+
+
+def _place_rooms(instance, slots, deadline=None, num_search_workers=None):
+    """Rooms for a slot assignment: phase 2, or with room sharing on the shared-room packer.
+
+    Returns (rooms, phase 2 stats, packing stats); the phase 2 stats are
+    None when the packer placed the rooms and the packing stats otherwise.
+    """
+    if instance.room_sharing:
+        rooms, _, packing = pack_shared(instance, slots)
+        return rooms.tolist(), None, packing
+    rooms, phase2 = assign_rooms(instance, slots, deadline, num_search_workers)
+    return rooms, phase2, None
+
+
+def two_phase_schedule(instance, max_time_in_seconds=None, num_search_workers=None, hint=None):
+    """Decomposed CP-SAT: slots for all courses first, then rooms slot by slot.
+
+    `max_time_in_seconds` bounds the whole run: phase 1 may use all of it and
+    each phase 2 slot gets an equal share of what is left. With room sharing
+    on, phase 2 is skipped and the shared-room packer places the rooms
+    (rooms_from is 'room_packing'). Returns a dict with per-course slots and
+    rooms (None when infeasible), the solver status and per-phase statistics
+    including objective, bound and gap.
+    """
+    started = time.time()
+    deadline = started + max_time_in_seconds if max_time_in_seconds else None
+    too_big = oversized_courses(instance)
+    if too_big:
+        return _oversized_result(instance, too_big)
+
+    phase1 = solve_slot_assignment(instance, max_time_in_seconds, num_search_workers, hint)
+    result = {
+        'status': phase1['status'],
+        'phase1': {key: value for key, value in phase1.items() if key != 'slots'},
+        'slots': phase1['slots'],
+        'rooms': None
+    }
+    if phase1['slots'] is None:
+        return result
+
+    rooms, phase2, _ = _place_rooms(instance, phase1['slots'], deadline, num_search_workers)
+    if rooms is None:
+        result.update(phase2)
+        return result
+    result['rooms'] = rooms
+    if phase2 is None:
+        result['rooms_from'] = 'room_packing'
+    else:
+        result['phase2'] = phase2
+    result['wall_time'] = round(time.time() - started, 3)
+    return result
+
+
+def merge_two_phase_stats(parts):
+    """Combine two_phase_schedule statistics of independent parts solved on one slot calendar.
+
+    Phase 1 objective and bound are the largest over the parts (the parts
+    share the slots, so the span is the widest part's); phase 2 empty seats
+    and bounds add up. The status is OPTIMAL only when every part is.
+    """
+    phase1 = [part['phase1'] for part in parts]
+    phase2 = [part['phase2'] for part in parts if part.get('phase2')]
+    status = 'OPTIMAL' if all(part['status'] == 'OPTIMAL' for part in parts) else 'FEASIBLE'
+    objective = max((stats['objective'] for stats in phase1 if stats['objective'] is not None), default=None)
+    bound = max((stats['bound'] for stats in phase1 if stats['bound'] is not None), default=None)
+    merged = {
+        'status': status,
+        'phase1': {
+            'status': status,
+            'variables': sum(stats['variables'] for stats in phase1),
+            'hinted': sum(stats['hinted'] for stats in phase1),
+            'objective': objective,
+            'bound': bound,
+            'gap': _gap(objective, bound, status == 'OPTIMAL'),
+            'wall_time': max(stats['wall_time'] for stats in phase1)
+        }
+    }
+    if phase2:
+        wasted = sum(stats['wasted_seats'] for stats in phase2)
+        seat_bound = sum(stats['bound'] for stats in phase2)
+        optimal = all(stats['optimal'] for stats in phase2)
+        merged['phase2'] = {
+            'slots_solved': sum(stats['slots_solved'] for stats in phase2),
+            'wasted_seats': wasted,
+            'bound': seat_bound,
+            'optimal': optimal,
+            'gap': _gap(wasted, seat_bound, optimal),
+            'wall_time': max(stats['wall_time'] for stats in phase2)
+        }
+    return merged
+
+
+def minimize_slots(instance, upper_bound, max_time_in_seconds=None, num_search_workers=None, hint=None):
+    """Binary-search the fewest exam slots for which a schedule exists.
+
+    The lower bound is the larger of a conflict-graph clique and
+    room_lower_bound, which like the probes counts seats when rooms are
+    shared; `upper_bound` is typically the greedy coloring's color count.
+    Each probe resizes the instance and runs a pure feasibility slot model
+    with an equal share of the remaining time. If the upper bound itself is
+    not feasible (rooms are ignored by coloring) it is doubled until it is.
+    The instance is left sized to the best slot count found.
+
+    Returns the best slots/rooms, the slot count, the bounds, every probe and
+    `proven`: True when the lower end of the search was closed by proof and
+    the rooms were placed as the slot model assumed (with room sharing, the
+    packer seated every student without overflow or clashes).
+    """
+    started = time.time()
+    deadline = started + max_time_in_seconds if max_time_in_seconds else None
+    too_big = oversized_courses(instance)
+    if too_big:
+        return _oversized_result(instance, too_big)
+
+    clique = clique_lower_bound(instance.neighbor_lists())
+    lower = max(1, clique, room_lower_bound(instance))
+    upper = max(lower, int(upper_bound))
+    probes = []
+    best = None
+    proven = True
+
+    def probe(k):
+        if deadline:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            expected = math.ceil(math.log2(max(2, hi - lo + 1))) + 1
+            limit = remaining / expected
+        else:
+            limit = None
+        instance.resize_slots(k)
+        outcome = solve_slot_assignment(instance, limit, num_search_workers, hint, minimize_span=False)
+        probes.append({'slots': k, 'status': outcome['status'], 'wall_time': outcome['wall_time']})
+        return outcome
+
+    # Find a feasible upper end, growing it if rooms or absences rule it out
+    lo, hi = lower, upper
+    while best is None and hi <= instance.n_courses:
+        outcome = probe(hi)
+        if outcome is None:
+            break
+        if outcome['slots'] is not None:
+            best = (hi, outcome['slots'])
+        else:
+            if outcome['status'] != 'INFEASIBLE':
+                proven = False
+            lo = hi + 1
+            hi = min(hi * 2, instance.n_courses) if hi < instance.n_courses else hi + 1
+
+    # Binary search below the best known slot count
+    if best is not None:
+        hi = best[0] - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            outcome = probe(mid)
+            if outcome is None:
+                proven = False
+                break
+            if outcome['slots'] is not None:
+                best = (mid, outcome['slots'])
+                hi = mid - 1
+            else:
+                if outcome['status'] != 'INFEASIBLE':
+                    proven = False
+                lo = mid + 1
+
+    result = {
+        'status': 'FEASIBLE' if best else 'UNKNOWN',
+        'lower_bound': lower,
+        'clique_bound': clique,
+        'upper_bound': upper,
+        'probes': probes,
+        'proven': bool(best) and proven,
+        'slots': None,
+        'rooms': None
+    }
+    if best is None:
+        result['wall_time'] = round(time.time() - started, 3)
+        return result
+
+    n_slots, slots = best
+    instance.resize_slots(n_slots)
+    rooms, phase2, packing = _place_rooms(instance, slots, deadline, num_search_workers)
+    result.update({'n_slots': n_slots, 'slots': slots})
+    if packing is not None and (packing['overflow_students'] or packing['room_clashes']):
+        result['proven'] = False
+    if rooms is None:
+        result.update(phase2)
+    else:
+        result.update({'status': 'OPTIMAL' if result['proven'] else 'FEASIBLE', 'rooms': rooms})
+        result.update({'rooms_from': 'room_packing'} if phase2 is None else {'phase2': phase2})
+    result['wall_time'] = round(time.time() - started, 3)
+    return result
@@ -0,0 +1,173 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse.csgraph import connected_components
+
+from annealing import simulated_annealing, random_state, state_from_assignment
+from genetic import evolve, packed_cost, population_cost
+from coloring import dsatur
+from room_packing import assignment_from_coloring, pack_rooms, pack_shared
+from tabu import tabu_search
+
+
+def component_parts(instance, n_parts):
+    """Group the conflict graph's connected components into at most n_parts course-id lists.
+
+    Components never share students, so any grouping of them can be solved
+    independently. Groups are balanced by course count (largest component to
+    the lightest group), which keeps small components from each paying for a
+    worker of their own. Returns (n_components, parts).
+    """
+    n_components, labels = connected_components(instance.conflicts.matrix, directed=False)
+    members = [[] for _ in range(n_components)]
+    for c, label in enumerate(labels.tolist()):
+        members[label].append(c)
+    members.sort(key=len, reverse=True)
+
+    parts = [[] for _ in range(max(1, min(n_parts, n_components)))]
+    for component in members:
+        min(parts, key=len).extend(component)
+    return n_components, [sorted(part) for part in parts if part]
+
+
+def solve_part(engine, instance, params, seed=None):
+    """Solve one sub-instance with the named engine; returns (slots, rooms, stats), slots None on failure"""
+    started = time.time()
+    params = dict(params)
+    initial = params.pop('initial', None)
+    if engine == 'simulated_annealing':
+        rng = random.Random(seed)
+        state = state_from_assignment(instance, *initial) if initial else random_state(instance, rng)
+        result = simulated_annealing(state, rng=rng, **params)
+        slots, rooms = result['slots'], result['rooms']
+        stats = {'cost': result['cost'], 'iterations': result['iterations'], 'reheats': result['reheats']}
+    elif engine == 'tabu':
+        rng = random.Random(seed)
+        state = state_from_assignment(instance, *initial) if initial else random_state(instance, rng)
+        result = tabu_search(state, rng=rng, **params)
+        slots, rooms = result['slots'], result['rooms']
+        stats = {'cost': result['cost'], 'iterations': result['iterations']}
+    elif engine == 'genetic':
+        result = evolve(instance, rng=np.random.default_rng(seed), initial=initial, **params)
+        slots, rooms = result['slots'], result['rooms']
+        stats = {key: result[key] for key in ('cost', 'generations', 'evaluations', 'stop_reason')}
+    elif engine == 'cpsat':
+        # Imported here so SA/GA decomposition works without OR-Tools
+        from cpsat_engine import two_phase_schedule
+        hint = params.pop('hint', None)
+        params.pop('on_improve', None)
+        result = two_phase_schedule(instance, hint=hint, **params)
+        slots, rooms = (result['slots'], result['rooms']) if result['rooms'] is not None else (None, None)
+        stats = {key: result[key] for key in ('status', 'phase1', 'phase2', 'reason') if key in result}
+        stats['slots_used'] = result.get('phase1', {}).get('objective')
+    elif engine == 'lns':
+        from lns import lns_schedule
+        params.pop('on_improve', None)
+        start = initial[0] if initial else assignment_from_coloring(
+            instance, dsatur(instance.adj_indptr, instance.adj_indices))[0]
+        result = lns_schedule(instance, start, seed=seed, **params)
+        slots, rooms = result['slots'], result['rooms']
+        stats = {'objective': result['objective'], 'iterations': result['iterations']}
+    else:
+        raise ValueError(f"Unknown engine: {engine}")
+    stats['courses'] = instance.n_courses
+    stats['elapsed'] = round(time.time() - started, 3)
+    return slots, rooms, stats
+
+
+def merge_part_stats(engine, parts):
+    """Combine per-part engine statistics into the fields the engine reports for a whole instance"""
+    if engine in ('simulated_annealing', 'tabu', 'lns'):
+        merged = {'iterations': sum(part['iterations'] for part in parts)}
+        if engine == 'simulated_annealing':
+            merged['reheats'] = sum(part['reheats'] for part in parts)
+        if engine == 'lns':
+            merged['objective'] = sum(part['objective'] for part in parts)
+        return merged
+    if engine == 'genetic':
+        reasons = [part['stop_reason'] for part in parts]
+        return {
+            'generations': max(part['generations'] for part in parts),
+            'evaluations': sum(part['evaluations'] for part in parts),
+            # One reason when the parts agree, else each distinct one
+            'stop_reason': ', '.join(sorted(set(reasons))),
+            'stop_reasons': reasons
+        }
+    if engine == 'cpsat':
+        from cpsat_engine import merge_two_phase_stats
+        return merge_two_phase_stats(parts)
+    return {}
+
+
+def solve_by_components(instance, engine, params=None, max_workers=None, seed=None, hint=None, initial=None):
+    """Solve each group of connected components independently and merge the results.
+
+    Components are grouped into one part per worker; parts run in a process
+    pool with the same slots and calendar, then share the room pool through
+    pack_rooms, or through the shared-room packer when room sharing is on.
+    `hint` maps global course ids to slots and is split per part (CP-SAT
+    only); `initial` is a global (slots, rooms) warm start, split the same
+    way, for SA, tabu, GA and LNS.
+
+    Returns None when there is nothing to split (one component or one
+    worker), so the caller solves the whole instance. Otherwise returns the
+    merged slots/rooms, cost, per-part stats and the engine's own statistics
+    combined over the parts (merge_part_stats). If a part has no solution
+    the whole instance has none either: slots and rooms are None and status
+    says why.
+    """
+    started = time.time()
+    workers = max_workers or os.cpu_count() or 1
+    n_components, parts = component_parts(instance, workers)
+    if len(parts) < 2:
+        return None
+
+    params = dict(params or {})
+    seeds = random.Random(seed).sample(range(1 << 30), len(parts))
+    sub_params = []
+    for part in parts:
+        part_params = dict(params)
+        if hint is not None:
+            part_params['hint'] = {i: hint[c] for i, c in enumerate(part) if c in hint}
+        if initial is not None:
+            part_params['initial'] = (np.asarray(initial[0])[part], np.asarray(initial[1])[part])
+        sub_params.append(part_params)
+    subs = [instance.subset(part) for part in parts]
+
+    with ProcessPoolExecutor(max_workers=len(parts)) as pool:
+        results = list(pool.map(solve_part, [engine] * len(parts), subs, sub_params, seeds))
+    failed = [i for i, (part_slots, _, _) in enumerate(results) if part_slots is None]
+    if failed:
+        return {
+            'status': results[failed[0]][2]['status'],
+            'reason': f"no schedule for {len(failed)} of {len(parts)} component groups",
+            'slots': None,
+            'rooms': None,
+            'components': n_components,
+            'parts': [stats for _, _, stats in results],
+            'elapsed': round(time.time() - started, 3)
+        }
+
+    slots = np.zeros(instance.n_courses, dtype=np.int64)
+    for part, (part_slots, _, _) in zip(parts, results):
+        slots[part] = part_slots
+    part_stats = [stats for _, _, stats in results]
+    merged = {**merge_part_stats(engine, part_stats), 'components': n_components, 'parts': part_stats}
+    if instance.room_sharing:
+        # Shared rooms are packed per slot as they stand; no exam moves to find a room of its own
+        rooms, _, packing = pack_shared(instance, slots)
+        merged.update(cost=packed_cost(instance, slots, packing), relocated=0,
+                      unresolved=packing['overflow_courses'] + packing['room_clashes'], rooms_from='room_packing')
+    else:
+        slots, rooms, relocated, unresolved = pack_rooms(instance, slots)
+        merged.update(cost=int(population_cost(instance, slots[None, :], rooms[None, :])[0]),
+                      relocated=relocated, unresolved=unresolved)
+    return {
+        **merged,
+        'slots': slots.tolist(),
+        'rooms': rooms.tolist(),
+        'elapsed': round(time.time() - started, 3)
+    }
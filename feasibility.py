@@ -0,0 +1,109 @@
+import time
+
+import numpy as np
+
+from coloring import clique_lower_bound
+from cpsat_engine import room_lower_bound
+
+# Course codes listed per issue; the count is always reported in full
+MAX_LISTED = 20
+# Algorithms that add slots as needed instead of working within a fixed count
+UNBOUNDED_ALGORITHMS = ('graph_coloring', 'min_slots')
+
+
+def _issue(check, message, instance, courses, **details):
+    """One report entry: the failed check, a readable message and the courses involved"""
+    return {
+        'check': check,
+        'message': message,
+        'count': len(courses),
+        'courses': [instance.course_codes[c] for c in courses[:MAX_LISTED]],
+        **details
+    }
+
+
+def precheck(instance, bounded=True):
+    """Pre-flight analysis of a compiled ProblemInstance, without running any solver.
+
+    Runs necessary conditions for a conflict-free schedule that fits the rooms
+    and instructor calendars, in milliseconds:
+
+    - capacity: courses with more students than the largest room, or than
+      all rooms together when courses may be split across rooms
+    - rooms: above some room capacity, more courses than the rooms above it
+      can take, or with room sharing more students than those rooms seat
+      (cpsat_engine.room_lower_bound)
+    - clique: more pairwise conflicting courses than slots
+    - absences: courses whose instructor is away on every exam date
+
+    `feasible` is False when any check fails, which proves that no schedule
+    meets every constraint; True only means none of these checks found a
+    problem. With `bounded` off (engines that add slots as needed, such as
+    graph coloring and min_slots) the rooms, clique and absences checks
+    against the instance's slot count are reported as warnings and do not
+    affect `feasible`. Returns the issues, warnings, the bounds used and the
+    elapsed time.
+    """
+    started = time.perf_counter()
+    issues = []
+    warnings = []
+    # Checks against the slot count only block engines limited to it
+    slot_issues = issues if bounded else warnings
+    n_slots = instance.n_slots
+
+    if instance.n_rooms == 0:
+        issues.append(_issue('capacity', "No rooms are available", instance, list(range(instance.n_courses))))
+        largest = 0
+    else:
+        largest = int(instance.room_capacity.max())
+        # A split course only has to fit all the rooms together
+        limit = int(instance.room_capacity.sum()) if instance.split_courses else largest
+        too_big = np.flatnonzero(instance.enrollment > limit).tolist()
+        if too_big:
+            too_big.sort(key=lambda c: -instance.enrollment[c])
+            where = f"all rooms together ({limit} seats)" if instance.split_courses else f"the largest room ({largest} seats)"
+            issues.append(_issue(
+                'capacity',
+                f"{len(too_big)} course(s) have more students than {where}",
+                instance, too_big,
+                largest_room=largest,
+                largest_course=int(instance.enrollment[too_big[0]])
+            ))
+
+    room_bound = room_lower_bound(instance) if instance.n_rooms else 0
+    if room_bound > n_slots:
+        slot_issues.append(_issue(
+            'rooms',
+            f"The rooms need at least {room_bound} slots to seat every course, only {n_slots} are available",
+            instance, [], lower_bound=room_bound, slots=n_slots
+        ))
+
+    clique, members = clique_lower_bound(instance.neighbor_lists(), with_members=True)
+    if clique > n_slots:
+        slot_issues.append(_issue(
+            'clique',
+            f"{clique} courses all share students and need distinct slots, only {n_slots} are available",
+            instance, members, lower_bound=clique, slots=n_slots
+        ))
+
+    blocked = np.flatnonzero(instance.absent.all(axis=1)).tolist() if n_slots else []
+    if blocked:
+        instructors = sorted({instance.instructor_name(c) for c in blocked})
+        slot_issues.append(_issue(
+            'absences',
+            f"{len(blocked)} course(s) have an instructor who is absent on every exam date",
+            instance, blocked, instructors=instructors
+        ))
+
+    return {
+        'feasible': not issues,
+        'issues': issues,
+        'warnings': warnings,
+        'bounds': {
+            'slots': n_slots,
+            'clique': clique,
+            'rooms': room_bound,
+            'largest_room': largest
+        },
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
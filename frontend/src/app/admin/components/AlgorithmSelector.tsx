@@ -24,6 +24,11 @@ const algorithms = [
     id: 'genetic',
     name: 'Genetic Algorithm',
     description: 'Uses evolutionary algorithm inspired by natural selection'
+  },
+  {
+    id: 'portfolio',
+    name: 'Portfolio',
+    description: 'Races the algorithms in parallel under one deadline and keeps the best schedule'
   }
 ];
 
@@ -66,7 +71,8 @@ const AlgorithmSelector = ({ onScheduleGenerated, className = '' }: AlgorithmSel
       const data = await response.json();
       
       if (data.schedule) {
-        toast.success('Schedule generated successfully!');
+        const winner = data.run_info?.winner;
+        toast.success(winner ? `Schedule generated successfully (best: ${winner})!` : 'Schedule generated successfully!');
         if (onScheduleGenerated) {
           onScheduleGenerated(data.schedule);
         }
@@ -0,0 +1,331 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+CONFLICT_PENALTY = 100
+ROOM_PENALTY = 50
+CAPACITY_PENALTY = 25
+ABSENCE_PENALTY = 100
+
+# Edges compared per chunk when gathering (population x edges) slot pairs
+EDGE_CHUNK = 1 << 16
+
+
+def cost_components(instance, slots, rooms):
+    """Violation counts of every individual; slots/rooms are (population x courses) int arrays.
+
+    Returns a dict of per-individual arrays: conflicts (conflicting pairs
+    sharing a slot), room_clashes, overflow (students beyond room capacity)
+    and absences.
+    """
+    slots = np.asarray(slots)
+    rooms = np.asarray(rooms)
+    pop_size, n_courses = slots.shape
+
+    # Student conflicts: gather both endpoints of each edge and compare slots
+    # (narrow dtype halves the memory traffic of the gather)
+    conflicts = np.zeros(pop_size, dtype=np.int64)
+    u, v = instance.edge_u, instance.edge_v
+    narrow = slots.astype(np.int16) if instance.n_slots <= np.iinfo(np.int16).max else slots
+    for start in range(0, len(u), EDGE_CHUNK):
+        end = start + EDGE_CHUNK
+        conflicts += (narrow[:, u[start:end]] == narrow[:, v[start:end]]).sum(axis=1)
+
+    # Room clashes: count courses per (individual, slot, room) cell with one bincount
+    cells = instance.n_slots * instance.n_rooms
+    keys = (slots.astype(np.int64) * instance.n_rooms + rooms) + (np.arange(pop_size, dtype=np.int64) * cells)[:, None]
+    usage = np.bincount(keys.ravel(), minlength=pop_size * cells).reshape(pop_size, cells)
+
+    # Capacity overflow and instructor absences
+    overflow = instance.enrollment[None, :] - instance.room_capacity[rooms]
+    return {
+        'conflicts': conflicts,
+        'room_clashes': np.maximum(usage - 1, 0).sum(axis=1),
+        'overflow': np.maximum(overflow, 0).sum(axis=1),
+        'absences': instance.absent[np.arange(n_courses)[None, :], slots].sum(axis=1)
+    }
+
+
+def population_cost(instance, slots, rooms):
+    """Cost of every individual at once; slots/rooms are (population x courses) int arrays"""
+    parts = cost_components(instance, slots, rooms)
+    return (CONFLICT_PENALTY * parts['conflicts'] + ROOM_PENALTY * parts['room_clashes']
+            + CAPACITY_PENALTY * parts['overflow'] + ABSENCE_PENALTY * parts['absences'])
+
+
+def packed_cost(instance, slots, packing):
+    """Cost of one slot assignment whose rooms come from the shared-room packer.
+
+    Conflicts and absences are scored as usual; the packer's overflow and
+    room clashes (its stats) stand in for the room terms.
+    """
+    slots = np.asarray(slots)
+    conflicts = int((slots[instance.edge_u] == slots[instance.edge_v]).sum())
+    absences = int(instance.absent[np.arange(instance.n_courses), slots].sum())
+    return (CONFLICT_PENALTY * conflicts + ROOM_PENALTY * packing['room_clashes']
+            + CAPACITY_PENALTY * packing['overflow_students'] + ABSENCE_PENALTY * absences)
+
+
+def hard_violations(instance, slots, rooms):
+    """Conflicts, room clashes and absences of a single assignment (capacity overflow is soft)"""
+    parts = cost_components(instance, np.asarray(slots)[None, :], np.asarray(rooms)[None, :])
+    return int(parts['conflicts'][0] + parts['room_clashes'][0] + parts['absences'][0])
+
+
+class GeneticPopulation:
+    """Array-encoded GA population with batched fitness and cached elite costs"""
+
+    def __init__(self, instance, population_size=50, mutation_rate=0.1, crossover_rate=0.8,
+                 rng=None, slots=None, rooms=None, costs=None):
+        self.instance = instance
+        self.population_size = population_size
+        self.mutation_rate = mutation_rate
+        self.crossover_rate = crossover_rate
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        shape = (population_size, instance.n_courses)
+        self.slots = np.asarray(slots, dtype=np.int32) if slots is not None else \
+            self.rng.integers(0, instance.n_slots, shape, dtype=np.int32)
+        self.rooms = np.asarray(rooms, dtype=np.int32) if rooms is not None else \
+            self.rng.integers(0, instance.n_rooms, shape, dtype=np.int32)
+        self.costs = np.asarray(costs, dtype=np.int64) if costs is not None else \
+            population_cost(instance, self.slots, self.rooms)
+        self.evaluations = 0 if costs is not None else population_size
+
+    def step(self):
+        """Advance one generation: truncation selection, uniform crossover, mutation"""
+        rng, n_courses = self.rng, self.instance.n_courses
+        order = np.argsort(self.costs, kind='stable')
+        n_parents = self.population_size // 2
+        parents = order[:n_parents]
+        n_children = self.population_size - n_parents
+
+        # Uniform crossover; children that skip crossover copy their first parent
+        p1 = parents[rng.integers(0, n_parents, n_children)]
+        p2 = parents[rng.integers(0, n_parents, n_children)]
+        take_p1 = rng.random((n_children, n_courses)) < 0.5
+        take_p1 |= (rng.random(n_children) >= self.crossover_rate)[:, None]
+        child_slots = np.where(take_p1, self.slots[p1], self.slots[p2])
+        child_rooms = np.where(take_p1, self.rooms[p1], self.rooms[p2])
+
+        # Mutation: reassign one random course of selected children
+        mutants = np.flatnonzero(rng.random(n_children) < self.mutation_rate)
+        if len(mutants) and n_courses:
+            genes = rng.integers(0, n_courses, len(mutants))
+            child_slots[mutants, genes] = rng.integers(0, self.instance.n_slots, len(mutants))
+            child_rooms[mutants, genes] = rng.integers(0, self.instance.n_rooms, len(mutants))
+
+        # Surviving parents keep their cached cost; only children are evaluated
+        child_costs = population_cost(self.instance, child_slots, child_rooms)
+        self.evaluations += n_children
+        self.slots = np.concatenate((self.slots[parents], child_slots))
+        self.rooms = np.concatenate((self.rooms[parents], child_rooms))
+        self.costs = np.concatenate((self.costs[parents], child_costs))
+
+    def warm_start(self, slots, rooms, fraction=0.2):
+        """Replace the worst `fraction` of the population with copies of a known assignment.
+
+        The first copy is exact; the others get one mutated gene each so the
+        seeded individuals do not collapse diversity.
+        """
+        k = max(1, int(self.population_size * fraction))
+        seeded_slots = np.tile(np.asarray(slots, dtype=np.int32), (k, 1))
+        seeded_rooms = np.tile(np.asarray(rooms, dtype=np.int32), (k, 1))
+        if k > 1 and self.instance.n_courses:
+            genes = self.rng.integers(0, self.instance.n_courses, k - 1)
+            seeded_slots[np.arange(1, k), genes] = self.rng.integers(0, self.instance.n_slots, k - 1)
+            seeded_rooms[np.arange(1, k), genes] = self.rng.integers(0, self.instance.n_rooms, k - 1)
+        costs = population_cost(self.instance, seeded_slots, seeded_rooms)
+        self.evaluations += k
+        self.inject(seeded_slots, seeded_rooms, costs)
+
+    def best(self):
+        """(slots, rooms, cost) of the best individual"""
+        i = int(np.argmin(self.costs))
+        return self.slots[i].copy(), self.rooms[i].copy(), int(self.costs[i])
+
+    def top(self, k):
+        """(slots, rooms, costs) of the k best individuals"""
+        order = np.argsort(self.costs, kind='stable')[:k]
+        return self.slots[order].copy(), self.rooms[order].copy(), self.costs[order].copy()
+
+    def inject(self, slots, rooms, costs):
+        """Replace the worst individuals with the given ones (e.g. migrants)"""
+        k = min(len(costs), self.population_size)
+        worst = np.argsort(self.costs, kind='stable')[::-1][:k]
+        self.slots[worst] = slots[:k]
+        self.rooms[worst] = rooms[:k]
+        self.costs[worst] = costs[:k]
+
+
+def evolve(instance, population_size=50, mutation_rate=0.1, crossover_rate=0.8, generations=200,
+           time_budget=None, stagnation_window=50, stop_when_feasible=True, rng=None, initial=None,
+           record_every=50, on_improve=None):
+    """Run one GA population until a stopping rule fires.
+
+    Stops after `generations` generations, once `time_budget` seconds pass,
+    when the best cost has not improved for `stagnation_window` generations,
+    or (with `stop_when_feasible`) as soon as the best individual has no hard
+    violations. `initial` is an optional (slots, rooms) warm start. Returns
+    the best solution with the generation count, elapsed time and reason at
+    termination, plus best costs sampled every `record_every` generations.
+    `on_improve`, if given, is called as on_improve(slots, rooms, cost) on
+    every new best.
+    """
+    started = time.time()
+    deadline = started + time_budget if time_budget else None
+    population = GeneticPopulation(instance, population_size=population_size, mutation_rate=mutation_rate,
+                                   crossover_rate=crossover_rate, rng=rng)
+    if initial is not None:
+        population.warm_start(*initial)
+
+    best_cost = int(population.costs.min())
+    last_improvement = 0
+    history = [(0, best_cost)]
+    generation = 0
+    stop_reason = 'generations'
+    check_feasible = stop_when_feasible
+    while generation < generations:
+        # The best individual only changes when the best cost improves
+        if check_feasible:
+            slots, rooms, _ = population.best()
+            if hard_violations(instance, slots, rooms) == 0:
+                stop_reason = 'feasible'
+                break
+            check_feasible = False
+        if deadline is not None and time.time() >= deadline:
+            stop_reason = 'time_budget'
+            break
+        if generation - last_improvement >= stagnation_window:
+            stop_reason = 'stagnation'
+            break
+
+        population.step()
+        generation += 1
+        cost = int(population.costs.min())
+        if cost < best_cost:
+            best_cost, last_improvement = cost, generation
+            check_feasible = stop_when_feasible
+            if on_improve is not None:
+                on_improve(*population.best())
+        if generation % record_every == 0:
+            history.append((generation, best_cost))
+
+    slots, rooms, cost = population.best()
+    if history[-1][0] != generation:
+        history.append((generation, cost))
+    return {
+        'slots': slots,
+        'rooms': rooms,
+        'cost': cost,
+        'generations': generation,
+        'evaluations': population.evaluations,
+        'elapsed': round(time.time() - started, 3),
+        'stop_reason': stop_reason,
+        'history': history
+    }
+
+
+# Island model: each worker process holds the instance once (set by the pool
+# initializer) and evolves whichever island it is handed for one epoch.
+_island_instance = None
+
+
+def _init_island_worker(instance):
+    global _island_instance
+    _island_instance = instance
+
+
+def _evolve_island(island, generations, deadline, settings):
+    """Evolve one island for up to `generations` generations or until the deadline"""
+    population = GeneticPopulation(
+        _island_instance,
+        rng=island['rng'],
+        slots=island['slots'],
+        rooms=island['rooms'],
+        costs=island['costs'],
+        **settings
+    )
+    done = 0
+    while done < generations and (deadline is None or time.time() < deadline):
+        population.step()
+        done += 1
+    return {
+        'slots': population.slots,
+        'rooms': population.rooms,
+        'costs': population.costs,
+        'rng': population.rng,
+        'generations': island['generations'] + done,
+        'evaluations': island['evaluations'] + population.evaluations
+    }
+
+
+def island_genetic_algorithm(instance, n_islands=None, migration_interval=20, migrants=2,
+                             generations=200, time_budget=None, population_size=50,
+                             mutation_rate=0.1, crossover_rate=0.8, seed=None, max_workers=None):
+    """Island-model GA: sub-populations evolve in worker processes and migrate in a ring.
+
+    Every `migration_interval` generations the best `migrants` individuals of
+    each island replace the worst of the next island. Stops after
+    `generations` generations per island or once `time_budget` seconds pass.
+    """
+    started = time.time()
+    deadline = started + time_budget if time_budget else None
+    n_islands = max(1, n_islands or os.cpu_count() or 1)
+    settings = {
+        'population_size': population_size,
+        'mutation_rate': mutation_rate,
+        'crossover_rate': crossover_rate
+    }
+
+    islands = []
+    for rng in (np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n_islands)):
+        population = GeneticPopulation(instance, rng=rng, **settings)
+        islands.append({
+            'slots': population.slots, 'rooms': population.rooms, 'costs': population.costs,
+            'rng': population.rng, 'generations': 0, 'evaluations': population.evaluations
+        })
+
+    history = []
+    epochs = 0
+    workers = min(n_islands, max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_island_worker, initargs=(instance,)) as pool:
+        while islands[0]['generations'] < generations and (deadline is None or time.time() < deadline):
+            epoch = min(migration_interval, generations - islands[0]['generations'])
+            islands = list(pool.map(_evolve_island, islands, [epoch] * n_islands,
+                                    [deadline] * n_islands, [settings] * n_islands))
+            epochs += 1
+            history.append({
+                'generation': islands[0]['generations'],
+                'elapsed': round(time.time() - started, 3),
+                'best_cost': int(min(island['costs'].min() for island in islands))
+            })
+
+            # Ring migration: island i's best replace island i+1's worst
+            if n_islands > 1 and migrants > 0:
+                outgoing = []
+                for island in islands:
+                    order = np.argsort(island['costs'], kind='stable')[:migrants]
+                    outgoing.append((island['slots'][order], island['rooms'][order], island['costs'][order]))
+                for i, island in enumerate(islands):
+                    slots, rooms, costs = outgoing[i - 1]
+                    worst = np.argsort(island['costs'], kind='stable')[::-1][:len(costs)]
+                    island['slots'][worst] = slots
+                    island['rooms'][worst] = rooms
+                    island['costs'][worst] = costs
+
+    best_island = min(range(n_islands), key=lambda i: islands[i]['costs'].min())
+    best = int(np.argmin(islands[best_island]['costs']))
+    return {
+        'slots': islands[best_island]['slots'][best].copy(),
+        'rooms': islands[best_island]['rooms'][best].copy(),
+        'cost': int(islands[best_island]['costs'][best]),
+        'islands': n_islands,
+        'epochs': epochs,
+        'generations': islands[0]['generations'],
+        'evaluations': int(sum(island['evaluations'] for island in islands)),
+        'elapsed': round(time.time() - started, 3),
+        'history': history
+    }
@@ -0,0 +1,221 @@
+import random
+import time
+
+import numpy as np
+
+try:
+    from ortools.sat.python import cp_model
+    ORTOOLS_AVAILABLE = True
+except ImportError:
+    ORTOOLS_AVAILABLE = False
+
+from cpsat_engine import capacity_levels, seat_levels
+from genetic import ABSENCE_PENALTY, CAPACITY_PENALTY, CONFLICT_PENALTY, ROOM_PENALTY, packed_cost
+from room_packing import pack_rooms, pack_shared
+
+# Consecutive non-improving, optimally solved neighbourhoods before the size grows
+GROW_AFTER = 10
+
+
+def room_levels(instance):
+    """Capacity levels of the slot model with their penalty: (k, capacity, demand, penalty per unit over).
+
+    Courses in excess of the rooms that can take them cost ROOM_PENALTY
+    each; with room sharing, students in excess of the seats cost
+    CAPACITY_PENALTY each, as overflowing students do in packed_cost.
+    """
+    return ([(level, capacity, demand, ROOM_PENALTY) for level, capacity, demand in capacity_levels(instance)]
+            + [(level, seats, demand, CAPACITY_PENALTY) for level, seats, demand in seat_levels(instance)])
+
+
+def slot_cost(instance, slots, levels=None):
+    """Slot-level objective: conflicting pairs, absences and per-slot room shortfall.
+
+    The room term counts, for every slot and level of room_levels, the
+    courses over k beyond what the rooms over k can take, which is zero
+    exactly when each slot's courses can get rooms of their own (see
+    cpsat_engine). With room sharing the rooms are packed as they will be
+    saved and scored with packed_cost, so the objective is the schedule's;
+    the levels, in seats as well, then only guide the sub-problems.
+    """
+    slots = np.asarray(slots)
+    if instance.room_sharing:
+        return packed_cost(instance, slots, pack_shared(instance, slots)[2])
+    levels = levels or room_levels(instance)
+    conflicts = int((slots[instance.edge_u] == slots[instance.edge_v]).sum())
+    absences = int(instance.absent[np.arange(instance.n_courses), slots].sum())
+    shortfall = 0
+    for _, capacity, demand, penalty in levels:
+        counts = np.bincount(slots, weights=demand, minlength=instance.n_slots)
+        shortfall += penalty * int(np.maximum(counts - capacity, 0).sum())
+    return CONFLICT_PENALTY * conflicts + ABSENCE_PENALTY * absences + shortfall
+
+
+def _neighborhood(instance, slots, rng, size):
+    """Pick up to `size` courses to free and the slots they may use: from one instructor or two slots.
+
+    An instructor without courses (possible in a subset of the instance)
+    falls back to the slot pair, whose first slot always holds courses.
+    """
+    n_slots = instance.n_slots
+    clash = slots[instance.edge_u] == slots[instance.edge_v]
+    free = np.empty(0, dtype=np.int64)
+    allowed = np.arange(n_slots)
+    if rng.random() < 0.5 and len(instance.instructors):
+        instructor = rng.randrange(len(instance.instructors))
+        free = np.flatnonzero(instance.instructor_of == instructor)
+        kind = 'instructor'
+    if not len(free):
+        # Favour slots that hold conflicts
+        weights = (np.bincount(slots[instance.edge_u][clash], minlength=n_slots) + 1).tolist()
+        occupied = np.bincount(slots, minlength=n_slots) > 0
+        first = rng.choices(range(n_slots), [w if o else 0 for w, o in zip(weights, occupied.tolist())])[0]
+        others = [t for t in range(n_slots) if t != first]
+        chosen = [first] + ([rng.choices(others, [weights[t] for t in others])[0]] if others else [])
+        # The freed courses may go to any slot, so conflicts can leave the pair
+        free = np.flatnonzero(np.isin(slots, chosen))
+        kind = 'slots'
+    if len(free) > size:
+        # Conflicting courses first, the rest at random
+        clashing = set(instance.edge_u[clash].tolist()) | set(instance.edge_v[clash].tolist())
+        pool = free.tolist()
+        rng.shuffle(pool)
+        pool.sort(key=lambda c: c not in clashing)
+        free = np.sort(np.asarray(pool[:size]))
+    return kind, free, allowed
+
+
+def _reoptimize(instance, slots, free, allowed, levels, time_limit, num_search_workers):
+    """Re-solve the slots of the `free` courses within `allowed` slots, all others fixed.
+
+    Returns (new slots or None, whether the sub-problem was solved to optimality).
+    """
+    model = cp_model.CpModel()
+    free_set = set(free.tolist())
+    allowed_list = allowed.tolist()
+    penalties = []
+
+    y = {}
+    for c in free.tolist():
+        for t in allowed_list:
+            y[(c, t)] = model.NewBoolVar(f'y_{c}_{t}')
+            model.AddHint(y[(c, t)], slots[c] == t)
+            if instance.absent[c, t]:
+                penalties.append(ABSENCE_PENALTY * y[(c, t)])
+        model.AddExactlyOne(y[(c, t)] for t in allowed_list)
+
+    # Conflicts with fixed courses are linear; conflicts inside the neighbourhood need a clash literal
+    for c in free.tolist():
+        for u in instance.neighbors(c).tolist():
+            if u in free_set:
+                if u < c:
+                    continue
+                for t in allowed_list:
+                    clash = model.NewBoolVar(f'k_{c}_{u}_{t}')
+                    model.AddBoolOr([y[(c, t)].Not(), y[(u, t)].Not(), clash])
+                    penalties.append(CONFLICT_PENALTY * clash)
+            elif (c, slots[u]) in y:
+                penalties.append(CONFLICT_PENALTY * y[(c, slots[u])])
+
+    # Room shortfall per allowed slot and level, fixed courses as constants
+    fixed = np.ones(instance.n_courses, dtype=bool)
+    fixed[free] = False
+    for i, (level, capacity, demand, penalty) in enumerate(levels):
+        fixed_counts = np.bincount(slots[fixed], weights=demand[fixed], minlength=instance.n_slots).astype(np.int64)
+        weights = demand.tolist()
+        movers = [c for c in free.tolist() if weights[c]]
+        for t in allowed_list:
+            if not movers and fixed_counts[t] <= capacity:
+                continue
+            most = sum(weights[c] for c in movers) + int(fixed_counts[t])
+            excess = model.NewIntVar(0, most, f'e_{i}_{level}_{t}')
+            model.Add(excess >= int(fixed_counts[t]) + sum(weights[c] * y[(c, t)] for c in movers) - capacity)
+            penalties.append(penalty * excess)
+
+    model.Minimize(sum(penalties))
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = float(time_limit)
+    if num_search_workers:
+        solver.parameters.num_search_workers = int(num_search_workers)
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None, False
+    new_slots = slots.copy()
+    for (c, t), var in y.items():
+        if solver.Value(var):
+            new_slots[c] = t
+    return new_slots, status == cp_model.OPTIMAL
+
+
+def lns_schedule(instance, slots, time_budget=60, sub_time_limit=0.5, max_free=400,
+                 initial_free=10, num_search_workers=None, seed=None):
+    """Large Neighbourhood Search: repeatedly re-optimize a freed part of the schedule with CP-SAT.
+
+    Starts from any slot assignment (e.g. a graph coloring) and keeps the
+    slot-level objective (slot_cost) non-increasing. Each iteration frees the
+    courses of two slots (favouring slots with conflicts) or of one
+    instructor and lets them take any slot, solving only those under
+    `sub_time_limit` seconds. The neighbourhood size starts at `initial_free`
+    and adapts: it grows (up to `max_free`) after GROW_AFTER sub-problems in a
+    row are solved to optimality without improving, and shrinks when one hits
+    the time limit, so each solve stays small enough for CP-SAT to finish.
+    Rooms are packed at the end, shared or one exam per room as the instance
+    says. Returns slots, rooms, the objective trajectory as (elapsed,
+    objective) points and per-neighbourhood statistics.
+    """
+    started = time.time()
+    deadline = started + time_budget
+    rng = random.Random(seed)
+    levels = room_levels(instance)
+    slots = np.asarray(slots, dtype=np.int64).copy()
+    objective = slot_cost(instance, slots, levels)
+    trajectory = [(0.0, objective)]
+    stats = {'slots': {'tried': 0, 'improved': 0}, 'instructor': {'tried': 0, 'improved': 0}}
+    iterations = 0
+    size = max(1, min(initial_free, max_free))
+    stalled = 0
+
+    while objective > 0 and time.time() < deadline:
+        kind, free, allowed = _neighborhood(instance, slots, rng, size)
+        iterations += 1
+        stats[kind]['tried'] += 1
+        limit = min(sub_time_limit, max(0.1, deadline - time.time()))
+        candidate, optimal = _reoptimize(instance, slots, free, allowed, levels, limit, num_search_workers)
+        if not optimal:
+            size = max(2, int(size * 0.7))
+        if candidate is None:
+            continue
+        value = slot_cost(instance, candidate, levels)
+        stalled = stalled + 1 if optimal and value >= objective else 0
+        if stalled >= GROW_AFTER:
+            size, stalled = min(max_free, int(size * 1.2) + 1), 0
+        if value <= objective:
+            if value < objective:
+                stats[kind]['improved'] += 1
+                trajectory.append((round(time.time() - started, 3), value))
+            slots, objective = candidate, value
+
+    if instance.room_sharing:
+        # Shared rooms are packed per slot as they stand; no exam moves to find a room of its own
+        rooms, _, packing = pack_shared(instance, slots)
+        relocated, unresolved = 0, packing['overflow_courses'] + packing['room_clashes']
+    else:
+        slots, rooms, relocated, unresolved = pack_rooms(instance, slots)
+    final = slot_cost(instance, slots, levels)
+    if final != objective:
+        trajectory.append((round(time.time() - started, 3), final))
+    result = {
+        'slots': slots.tolist(),
+        'rooms': rooms.tolist(),
+        'objective': final,
+        'iterations': iterations,
+        'neighborhoods': stats,
+        'neighborhood_size': size,
+        'relocated': relocated,
+        'unresolved': unresolved,
+        'elapsed': round(time.time() - started, 3),
+        'trajectory': trajectory
+    }
+    if instance.room_sharing:
+        result['rooms_from'] = 'room_packing'
+    return result
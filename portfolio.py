@@ -0,0 +1,183 @@
+import multiprocessing
+import queue
+import random
+import time
+
+import numpy as np
+
+from cpsat_engine import ORTOOLS_AVAILABLE
+from decomposition import solve_part
+from genetic import CAPACITY_PENALTY, packed_cost, population_cost
+from room_packing import pack_shared
+
+# Engines raced when none are named; OR-Tools ones are dropped if it is missing
+DEFAULT_ENGINES = ('simulated_annealing', 'tabu', 'genetic', 'cpsat', 'lns')
+ORTOOLS_ENGINES = ('cpsat', 'lns')
+# Seconds between best-so-far reports from one engine
+REPORT_INTERVAL = 0.5
+# Seconds an engine gets after the deadline to hand in its result before it is terminated
+GRACE_PERIOD = 2.0
+
+
+def cost_lower_bound(instance):
+    """Penalty no schedule can avoid: the overflow of courses larger than every room.
+
+    With shared rooms and splitting on, only courses larger than all rooms
+    together have to overflow.
+    """
+    if not instance.n_rooms:
+        limit = 0
+    elif instance.room_sharing and instance.split_courses:
+        limit = instance.room_capacity.sum()
+    else:
+        limit = instance.room_capacity.max()
+    return CAPACITY_PENALTY * int(np.maximum(instance.enrollment - limit, 0).sum())
+
+
+def schedule_cost(instance, slots, rooms):
+    """Cost of one engine's schedule as it will be saved: with room sharing its rooms are repacked first"""
+    if instance.room_sharing:
+        return packed_cost(instance, slots, pack_shared(instance, np.asarray(slots))[2])
+    return int(population_cost(instance, np.asarray(slots)[None, :], np.asarray(rooms)[None, :])[0])
+
+
+def _engine_params(engine, budget, initial, hint, options):
+    """solve_part params for one engine: its options plus the shared budget and warm start"""
+    params = dict(options.get(engine, {}))
+    if engine == 'cpsat':
+        params['max_time_in_seconds'] = budget
+        if hint is not None:
+            params['hint'] = hint
+    else:
+        params['time_budget'] = budget
+        params.pop('max_iterations', None)
+        if initial is not None:
+            params['initial'] = initial
+    if engine == 'genetic':
+        # Let the deadline, not the generation count, end the run
+        params['generations'] = params.get('generations') or 1 << 30
+    return params
+
+
+def _run_engine(engine, instance, params, seed, results):
+    """Worker process: run one engine, posting throttled best-so-far reports and then its result"""
+    last_report = [0.0]
+
+    def report(slots, rooms, cost):
+        now = time.time()
+        if now - last_report[0] >= REPORT_INTERVAL:
+            last_report[0] = now
+            results.put(('improved', engine, np.asarray(slots).tolist(), np.asarray(rooms).tolist(), None))
+
+    try:
+        slots, rooms, stats = solve_part(engine, instance, dict(params, on_improve=report), seed)
+    except Exception as e:
+        results.put(('failed', engine, None, None, {'error': str(e)}))
+        return
+    if slots is None:
+        results.put(('failed', engine, None, None, stats))
+    else:
+        results.put(('finished', engine, np.asarray(slots).tolist(), np.asarray(rooms).tolist(), stats))
+
+
+def portfolio_schedule(instance, engines=None, time_budget=60, initial=None, hint=None, options=None,
+                       seed=None, on_improve=None):
+    """Race several engines in worker processes under one deadline and keep the best schedule.
+
+    Every engine gets its own process and the full `time_budget`; `initial`
+    is a (slots, rooms) warm start for SA, tabu, GA and LNS and the first
+    incumbent (credited to 'graph_coloring'), `hint` a {course: slot} hint for
+    CP-SAT, and `options` per-engine solve_part params. Engines report new
+    bests at most every REPORT_INTERVAL seconds; all reports are scored with
+    schedule_cost, and each improvement of the incumbent is recorded and
+    passed to on_improve(engine, cost, elapsed, slots, rooms). The race ends
+    when every engine is done, when the incumbent reaches cost_lower_bound
+    (proven optimal) or at the deadline; engines still running are
+    terminated. Returns the best slots/rooms, cost, winning engine, whether it
+    is proven optimal, the improvement history and per-engine outcomes.
+    """
+    started = time.time()
+    deadline = started + time_budget
+    engines = list(engines or [engine for engine in DEFAULT_ENGINES
+                               if ORTOOLS_AVAILABLE or engine not in ORTOOLS_ENGINES])
+    options = options or {}
+    lower_bound = cost_lower_bound(instance)
+
+    best = {'slots': None, 'rooms': None, 'cost': None, 'engine': None}
+    history = []
+    outcomes = {engine: {'status': 'skipped', 'cost': None, 'reports': 0} for engine in engines}
+
+    def proven():
+        return best['cost'] is not None and best['cost'] <= lower_bound
+
+    def offer(engine, slots, rooms):
+        """Score a reported schedule and make it the incumbent if it is better"""
+        cost = schedule_cost(instance, slots, rooms)
+        outcome = outcomes[engine]
+        if outcome['cost'] is None or cost < outcome['cost']:
+            outcome['cost'] = cost
+        if best['cost'] is None or cost < best['cost']:
+            elapsed = round(time.time() - started, 3)
+            best.update(slots=list(slots), rooms=list(rooms), cost=cost, engine=engine)
+            history.append((elapsed, engine, cost))
+            if on_improve is not None:
+                on_improve(engine, cost, elapsed, best['slots'], best['rooms'])
+
+    if initial is not None:
+        outcomes['graph_coloring'] = {'status': 'finished', 'cost': None, 'reports': 1}
+        offer('graph_coloring', np.asarray(initial[0]).tolist(), np.asarray(initial[1]).tolist())
+
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    seeds = random.Random(seed).sample(range(1 << 30), len(engines))
+    workers = {}
+    if not proven():
+        for engine, engine_seed in zip(engines, seeds):
+            params = _engine_params(engine, time_budget, initial, hint, options)
+            process = context.Process(target=_run_engine, args=(engine, instance, params, engine_seed, results),
+                                      daemon=True)
+            process.start()
+            workers[engine] = process
+            outcomes[engine]['status'] = 'running'
+
+    pending = set(workers)
+    while pending and not proven():
+        remaining = deadline + GRACE_PERIOD - time.time()
+        if remaining <= 0:
+            break
+        try:
+            kind, engine, slots, rooms, stats = results.get(timeout=min(remaining, REPORT_INTERVAL))
+        except queue.Empty:
+            continue
+        outcome = outcomes[engine]
+        if kind == 'improved':
+            outcome['reports'] += 1
+        else:
+            pending.discard(engine)
+            outcome['status'] = kind
+            outcome['elapsed'] = round(time.time() - started, 3)
+            outcome['stats'] = stats
+        if slots is not None:
+            offer(engine, slots, rooms)
+
+    # Cancel whatever is still running
+    for engine, process in workers.items():
+        if engine in pending:
+            outcomes[engine]['status'] = 'cancelled'
+        if process.is_alive():
+            process.terminate()
+        process.join(timeout=1)
+    results.close()
+
+    return {
+        'slots': best['slots'],
+        'rooms': best['rooms'],
+        'cost': best['cost'],
+        'winner': best['engine'],
+        'proven_optimal': proven(),
+        'lower_bound': lower_bound,
+        'stop_reason': 'optimal' if proven() else ('deadline' if pending else 'all_finished'),
+        'engines': outcomes,
+        'history': history,
+        'elapsed': round(time.time() - started, 3)
+    }
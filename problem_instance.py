@@ -0,0 +1,240 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from conflict_graph import ConflictGraph
+
+# Session labels by exams per day; other counts use "Session 1", "Session 2", ...
+SESSION_NAMES = {
+    1: ('Morning',),
+    2: ('Morning', 'Evening'),
+    3: ('Morning', 'Afternoon', 'Evening')
+}
+
+
+class ProblemInstance:
+    """Dense integer-indexed exam scheduling problem shared by all solvers.
+
+    Courses, rooms, instructors and students are mapped to 0..n-1 ids. Per
+    course data (enrollment, instructor, roster) and the conflict adjacency
+    live in NumPy arrays so solvers never touch a DataFrame in their loops.
+    """
+
+    def __init__(self, course_codes, course_names, instructors, instructor_of,
+                 room_ids, room_names, room_capacity, student_ids, roster_indptr, roster_indices,
+                 conflicts, n_slots=10, start_date=None, max_exams_per_day=2, professor_absences=None,
+                 room_sharing=True, split_courses=True):
+        self.course_codes = list(course_codes)
+        self.course_index = {code: i for i, code in enumerate(self.course_codes)}
+        self.course_names = list(course_names)
+        self.instructors = list(instructors)
+        self.instructor_of = np.asarray(instructor_of, dtype=np.int64)
+
+        self.room_ids = list(room_ids)
+        self.room_names = list(room_names)
+        self.room_capacity = np.asarray(room_capacity, dtype=np.int64)
+
+        # Course -> students roster in CSR form
+        self.student_ids = list(student_ids)
+        self.roster_indptr = np.asarray(roster_indptr, dtype=np.int64)
+        self.roster_indices = np.asarray(roster_indices, dtype=np.int64)
+        self.enrollment = np.diff(self.roster_indptr)
+
+        # Conflict adjacency, aligned with course ids
+        self.conflicts = conflicts
+        self.adj_indptr = conflicts.matrix.indptr.astype(np.int64)
+        self.adj_indices = conflicts.matrix.indices.astype(np.int64)
+        self.adj_weights = conflicts.matrix.data.astype(np.int64)
+        self.edge_u, self.edge_v, self.edge_w = conflicts.edge_arrays()
+
+        self.start_date = start_date or (datetime.today().date() + timedelta(days=20))
+        self.max_exams_per_day = max_exams_per_day or 2
+        self.professor_absences = professor_absences or {}
+        # Whether exams in the same slot may share a room (seats permitting)
+        self.room_sharing = room_sharing
+        # Whether a course too large for one room may be split across several
+        self.split_courses = split_courses
+        self.resize_slots(n_slots)
+
+    @classmethod
+    def compile(cls, courses_df, students_df, rooms_df, constraints=None, conflicts=None, n_slots=10):
+        """Compile DataFrames (and an optional prebuilt ConflictGraph) into an instance"""
+        constraints = constraints or {}
+        courses = courses_df.drop_duplicates('course_code')
+        course_codes = courses['course_code'].tolist()
+        course_names = courses['course_name'].tolist() if 'course_name' in courses else [''] * len(course_codes)
+
+        # Instructors: dense ids, -1 for unassigned
+        instructor_col = courses['instructor'] if 'instructor' in courses else pd.Series([None] * len(courses))
+        instructor_of, instructors = pd.factorize(instructor_col.where(instructor_col.notna() & (instructor_col != ''), None))
+
+        # Rosters from one vectorized pass over the enrollments
+        if students_df is not None and not students_df.empty and {'student_id', 'course_code'} <= set(students_df.columns):
+            pairs = students_df[['student_id', 'course_code']].dropna().drop_duplicates()
+            course_of = pd.Categorical(pairs['course_code'], categories=course_codes).codes.astype(np.int64)
+            known = course_of >= 0
+            student_of, student_ids = pd.factorize(pairs['student_id'][known])
+            course_of = course_of[known]
+            order = np.argsort(course_of, kind='stable')
+            roster_indices = student_of[order]
+            roster_indptr = np.concatenate(([0], np.cumsum(np.bincount(course_of, minlength=len(course_codes)))))
+        else:
+            student_ids = []
+            roster_indices = np.zeros(0, dtype=np.int64)
+            roster_indptr = np.zeros(len(course_codes) + 1, dtype=np.int64)
+
+        if conflicts is None:
+            conflicts = ConflictGraph.from_enrollments(students_df, course_codes)
+        elif conflicts.course_codes != course_codes:
+            conflicts = conflicts.subgraph(course_codes)
+
+        return cls(
+            course_codes, course_names, list(instructors), instructor_of,
+            rooms_df['room_id'].tolist(),
+            rooms_df['room_name'].tolist(),
+            pd.to_numeric(rooms_df['capacity'], errors='coerce').fillna(0).astype(int).tolist(),
+            list(student_ids), roster_indptr, roster_indices,
+            conflicts,
+            n_slots=n_slots,
+            start_date=constraints.get('start_date'),
+            max_exams_per_day=constraints.get('max_exams_per_day'),
+            professor_absences=constraints.get('professor_absences'),
+            room_sharing=constraints.get('room_sharing', True),
+            split_courses=constraints.get('split_courses', True)
+        )
+
+    def subset(self, course_ids):
+        """Sub-instance over the given course ids, sharing rooms, slots and calendar"""
+        course_ids = np.asarray(course_ids, dtype=np.int64)
+        codes = [self.course_codes[c] for c in course_ids]
+        starts, ends = self.roster_indptr[course_ids], self.roster_indptr[course_ids + 1]
+        roster_indptr = np.concatenate(([0], np.cumsum(ends - starts)))
+        roster_indices = np.concatenate([self.roster_indices[s:e] for s, e in zip(starts, ends)]) \
+            if len(course_ids) else np.zeros(0, dtype=np.int64)
+        return ProblemInstance(
+            codes, [self.course_names[c] for c in course_ids], self.instructors, self.instructor_of[course_ids],
+            self.room_ids, self.room_names, self.room_capacity,
+            self.student_ids, roster_indptr, roster_indices,
+            self.conflicts.subgraph(codes),
+            n_slots=self.n_slots,
+            start_date=self.start_date,
+            max_exams_per_day=self.max_exams_per_day,
+            professor_absences=self.professor_absences,
+            room_sharing=self.room_sharing,
+            split_courses=self.split_courses
+        )
+
+    @property
+    def n_courses(self):
+        return len(self.course_codes)
+
+    @property
+    def n_rooms(self):
+        return len(self.room_ids)
+
+    def resize_slots(self, n_slots):
+        """Set the number of exam slots and recompute slot dates and absence masks"""
+        self.n_slots = n_slots
+        self.slot_dates = [self.slot_date(s) for s in range(n_slots)]
+
+        # absent[c, s]: the instructor of course c is away on the date of slot s
+        date_strs = [d.strftime('%Y-%m-%d') for d in self.slot_dates]
+        instructor_absent = np.zeros((len(self.instructors) + 1, n_slots), dtype=bool)
+        for i, instructor in enumerate(self.instructors):
+            away = set(self.professor_absences.get(instructor, []))
+            if away:
+                instructor_absent[i] = [d in away for d in date_strs]
+        # Row -1 (unassigned instructor) stays all False
+        self.absent = instructor_absent[self.instructor_of]
+
+    def slot_date(self, slot):
+        """Exam date of a slot, filling each day with max_exams_per_day slots"""
+        return self.start_date + timedelta(days=slot // self.max_exams_per_day)
+
+    def slot_session(self, slot):
+        """Session label of a slot, distinct for every slot of a day"""
+        index = slot % self.max_exams_per_day
+        names = SESSION_NAMES.get(self.max_exams_per_day)
+        return names[index] if names else f"Session {index + 1}"
+
+    def neighbors(self, c):
+        """Conflicting course ids of course c"""
+        return self.adj_indices[self.adj_indptr[c]:self.adj_indptr[c + 1]]
+
+    def neighbor_lists(self):
+        """Per-course Python lists of conflicting course ids (fast in pure-Python loops)"""
+        indptr, indices = self.adj_indptr, self.adj_indices.tolist()
+        return [indices[indptr[c]:indptr[c + 1]] for c in range(self.n_courses)]
+
+    def roster(self, c):
+        """Student IDs enrolled in course c"""
+        return [self.student_ids[s] for s in self.roster_indices[self.roster_indptr[c]:self.roster_indptr[c + 1]]]
+
+    def instructor_name(self, c):
+        i = self.instructor_of[c]
+        return self.instructors[i] if i >= 0 else None
+
+    def rosters(self):
+        """Per-course lists of student IDs, sliced from the CSR roster in one pass"""
+        students = np.asarray(self.student_ids, dtype=object)[self.roster_indices].tolist()
+        bounds = self.roster_indptr.tolist()
+        return [students[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    def materialize(self, slots, rooms, dates=None, sessions=None, splits=None):
+        """Exam records for a full assignment, emitted in one sweep over the course indexes.
+
+        `slots` and `rooms` are per-course ids. Dates and sessions come from
+        the slots unless per-course `dates` (YYYY-MM-DD strings) and
+        `sessions` are given. `splits` maps courses held in several rooms to
+        their [(room, seats), ...] parts. Every record carries the roster,
+        sorted by USN, as room_usns and a `rooms` list giving each room's
+        students as a contiguous USN range of it.
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        rooms = np.asarray(rooms, dtype=np.int64)
+        used = range(int(slots.max(initial=-1)) + 1)
+        if dates is None:
+            slot_dates = [self.slot_date(s).strftime('%Y-%m-%d') for s in used]
+            dates = [slot_dates[s] for s in slots.tolist()]
+        if sessions is None:
+            slot_sessions = [self.slot_session(s) for s in used]
+            sessions = [slot_sessions[s] for s in slots.tolist()]
+        # The trailing None serves instructor id -1 (unassigned)
+        instructors = np.asarray(self.instructors + [None], dtype=object)[self.instructor_of].tolist()
+        room_names = np.asarray(self.room_names, dtype=object)[rooms].tolist()
+        rosters = [sorted(roster, key=str) for roster in self.rosters()]
+        parts = [[(room, len(roster))] for room, roster in zip(rooms.tolist(), rosters)]
+        for c, course_parts in (splits or {}).items():
+            parts[c] = course_parts
+        room_lists = [self._room_ranges(course_parts, roster) for course_parts, roster in zip(parts, rosters)]
+        return [
+            {
+                'course_code': code,
+                'course_name': name,
+                'instructor': instructor,
+                'date': date,
+                'room': room,
+                'enrolled_students': enrolled,
+                'room_usns': usns,
+                'rooms': room_list,
+                'session': session
+            }
+            for code, name, instructor, date, room, enrolled, usns, room_list, session in zip(
+                self.course_codes, self.course_names, instructors, dates, room_names,
+                self.enrollment.tolist(), rosters, room_lists, sessions)
+        ]
+
+    def _room_ranges(self, parts, roster):
+        """[{room, students, first_usn, last_usn}] for consecutive slices of a sorted roster"""
+        ranges, start = [], 0
+        for room, seats in parts:
+            chunk = roster[start:start + seats]
+            ranges.append({
+                'room': self.room_names[room],
+                'students': len(chunk),
+                'first_usn': chunk[0] if chunk else None,
+                'last_usn': chunk[-1] if chunk else None
+            })
+            start += seats
+        return ranges
@@ -0,0 +1,196 @@
+import bisect
+
+import numpy as np
+
+
+def pack_rooms(instance, slots):
+    """Assign rooms slot by slot on the shared room pool, best fit for the largest courses first.
+
+    Courses that find no free room large enough in their slot are moved to
+    another slot where no conflicting course sits, the instructor is present
+    and a fitting room is free. Any that still do not fit keep their slot and
+    take its largest free room (or the largest room, clashing). Returns
+    (slots, rooms, relocated, unresolved).
+    """
+    slots = np.array(slots, dtype=np.int64)
+    rooms = np.zeros(instance.n_courses, dtype=np.int64)
+    by_capacity = np.argsort(instance.room_capacity, kind='stable')
+    capacity_sorted = instance.room_capacity[by_capacity]
+    taken = np.zeros((instance.n_slots, instance.n_rooms), dtype=bool)
+
+    def best_fit(c, t):
+        free = np.flatnonzero(~taken[t, by_capacity] & (capacity_sorted >= instance.enrollment[c]))
+        return int(by_capacity[free[0]]) if len(free) else None
+
+    overflow = []
+    for c in np.argsort(-instance.enrollment, kind='stable').tolist():
+        r = best_fit(c, slots[c])
+        if r is None:
+            overflow.append(c)
+        else:
+            rooms[c] = r
+            taken[slots[c], r] = True
+
+    relocated, unresolved = 0, 0
+    for c in overflow:
+        busy = set(slots[instance.neighbors(c)].tolist())
+        for t in range(instance.n_slots):
+            if t in busy or instance.absent[c, t]:
+                continue
+            r = best_fit(c, t)
+            if r is not None:
+                slots[c], rooms[c] = t, r
+                taken[t, r] = True
+                relocated += 1
+                break
+        else:
+            t = slots[c]
+            free = np.flatnonzero(~taken[t, by_capacity])
+            rooms[c] = by_capacity[free[-1]] if len(free) else by_capacity[-1]
+            taken[t, rooms[c]] = True
+            unresolved += 1
+    return slots, rooms, relocated, unresolved
+
+
+def assignment_from_coloring(instance, colors):
+    """Warm-start (slots, rooms) from a graph coloring, rooms assigned by capacity.
+
+    Colors map to slots directly. Courses whose color is past the last slot
+    or falls on a date their instructor is away move to the allowed slot with
+    the fewest conflicting courses (then the lightest load), and rooms are
+    then packed best fit via pack_rooms.
+    """
+    slots = np.asarray(colors, dtype=np.int64).copy()
+    load = np.bincount(slots[slots < instance.n_slots], minlength=instance.n_slots)
+    misplaced = np.flatnonzero((slots >= instance.n_slots)
+                               | instance.absent[np.arange(instance.n_courses), np.minimum(slots, instance.n_slots - 1)])
+    slots[misplaced] = -1
+    for c in misplaced.tolist():
+        clashes = np.bincount(slots[instance.neighbors(c)] + 1, minlength=instance.n_slots + 1)[1:]
+        allowed = np.flatnonzero(~instance.absent[c])
+        if not len(allowed):
+            allowed = np.arange(instance.n_slots)
+        t = int(allowed[np.lexsort((load[allowed], clashes[allowed]))[0]])
+        slots[c] = t
+        load[t] += 1
+    slots, rooms, _, _ = pack_rooms(instance, slots)
+    return slots, rooms
+
+
+def rooms_needed(enrollment, room_capacity):
+    """Per course: how many rooms, largest first, it takes to seat it (1 for courses that fit one room).
+
+    A course larger than all rooms together gets every room.
+    """
+    enrollment = np.asarray(enrollment, dtype=np.int64)
+    seats = np.cumsum(np.sort(np.asarray(room_capacity, dtype=np.int64))[::-1])
+    if not len(seats):
+        return np.ones(len(enrollment), dtype=np.int64)
+    return np.minimum(np.searchsorted(seats, enrollment) + 1, len(seats))
+
+
+def best_fit_decreasing(enrollment, room_capacity, groups, shared=True, split=False):
+    """Pack courses into shared rooms, one bin-packing problem per group (a date and session).
+
+    Within a group courses go largest first into the room whose remaining
+    seats fit them most tightly, so partly filled rooms are topped up before
+    a fresh room is opened and fresh rooms open smallest sufficient first.
+    Each group keeps a sorted (remaining seats, capacity, room) index, making
+    a placement a bisect. With `shared` off a room takes one course per
+    group. With `split` a course larger than every room is spread over the
+    rooms with the most seats left, the last part placed best fit. Any other
+    course that fits no room takes the room with the most seats left
+    (overflowing it), or the largest room once the group has none left (a
+    room clash).
+
+    Returns (rooms, splits, stats): rooms holds each course's (first) room
+    and splits maps split courses to their [(room, seats), ...] parts.
+    """
+    enrollment = np.asarray(enrollment, dtype=np.int64)
+    room_capacity = np.asarray(room_capacity, dtype=np.int64)
+    groups = np.asarray(groups, dtype=np.int64)
+    rooms = np.zeros(len(enrollment), dtype=np.int64)
+    splits = {}
+    fresh = sorted((int(cap), int(cap), r) for r, cap in enumerate(room_capacity.tolist()))
+    stats = {'groups': 0, 'rooms_used': 0, 'shared_rooms': 0, 'split_courses': 0, 'overflow_courses': 0,
+             'overflow_students': 0, 'room_clashes': 0, 'seat_utilization': 0.0}
+    if not len(enrollment) or not fresh:
+        return rooms, splits, stats
+
+    # One sort orders every group's courses largest first
+    order = np.lexsort((-enrollment, groups)).tolist()
+    sizes = enrollment.tolist()
+    largest = fresh[-1][1]
+    group_of = groups.tolist()
+    index, current = None, None
+    # (group, room) -> [courses, students]
+    usage = {}
+
+    def place(remaining, cap, r, seats):
+        if shared:
+            bisect.insort(index, (remaining - seats, cap, r))
+        used = usage.setdefault((current, r), [0, 0])
+        used[0] += 1
+        used[1] += seats
+
+    for c in order:
+        if group_of[c] != current:
+            current, index = group_of[c], list(fresh)
+            stats['groups'] += 1
+        need = sizes[c]
+        i = bisect.bisect_left(index, (need, -1, -1))
+        if i < len(index):
+            remaining, cap, r = index.pop(i)
+            place(remaining, cap, r, need)
+        elif split and need > largest and len(index) > 1 and index[-1][0] > 0:
+            # Fill the emptiest rooms until the rest fits one room, then place it best fit
+            parts = []
+            while need > 0 and index:
+                i = bisect.bisect_left(index, (need, -1, -1))
+                remaining, cap, r = index.pop(i if i < len(index) else -1)
+                if remaining <= 0:
+                    index.append((remaining, cap, r))
+                    break
+                seats = min(need, remaining)
+                parts.append((r, seats))
+                place(remaining, cap, r, seats)
+                need -= seats
+            if need > 0:
+                # Not enough seats left in the group: the last part overflows
+                stats['overflow_courses'] += 1
+                stats['overflow_students'] += need
+                r, seats = parts[-1]
+                parts[-1] = (r, seats + need)
+                usage[(current, r)][1] += need
+            r = parts[0][0]
+            if len(parts) > 1:
+                splits[c] = parts
+                stats['split_courses'] += 1
+        elif index:
+            remaining, cap, r = index.pop()
+            stats['overflow_courses'] += 1
+            stats['overflow_students'] += need - max(remaining, 0)
+            place(remaining, cap, r, need)
+        else:
+            remaining, cap, r = fresh[-1]
+            stats['room_clashes'] += 1
+            place(remaining, cap, r, need)
+        rooms[c] = r
+
+    capacity = room_capacity.tolist()
+    offered = sum(capacity[r] for _, r in usage)
+    seated = sum(min(students, capacity[r]) for (_, r), (_, students) in usage.items())
+    stats['rooms_used'] = len(usage)
+    stats['shared_rooms'] = sum(1 for courses, _ in usage.values() if courses > 1)
+    stats['seat_utilization'] = round(seated / offered, 3) if offered else 0.0
+    return rooms, splits, stats
+
+
+def pack_shared(instance, slots):
+    """Best-fit-decreasing packing of a slot assignment, one bin-packing problem per slot.
+
+    Rooms are shared and large courses split as the instance allows.
+    Returns (rooms, splits, stats) as best_fit_decreasing.
+    """
+    return best_fit_decreasing(instance.enrollment, instance.room_capacity, slots,
+                               shared=instance.room_sharing, split=instance.split_courses)
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# Students per bench
+BENCH_SIZE = 2
+# Department code of an RVCE-style USN: 1RV23AI001 -> AI
+DEPARTMENT_PATTERN = r'^\d[A-Z]{2}\d{2}([A-Z]+)\d'
+
+
+def department_codes(usns):
+    """Department of every USN, from its branch letters or else its non-numeric prefix.
+
+    Returns (integer codes, department names).
+    """
+    usns = pd.Series(usns, dtype=object).astype(str).str.upper()
+    departments = usns.str.extract(DEPARTMENT_PATTERN, expand=False)
+    departments = departments.fillna(usns.str.replace(r'\d+$', '', regex=True))
+    codes, names = pd.factorize(departments)
+    return codes, list(names)
+
+
+def _seat_arrays(schedule):
+    """Flatten a schedule into per-student arrays: usn, exam index and (date, session, room) key.
+
+    Each exam's roster is split over its rooms by the `rooms` USN ranges;
+    records without them seat the whole roster in `room`.
+    """
+    usns, exams, keys = [], [], []
+    for e, exam in enumerate(schedule):
+        roster = list(exam.get('room_usns') or [])
+        parts = exam.get('rooms') or [{'room': exam.get('room'), 'students': len(roster)}]
+        start = 0
+        for part in parts:
+            chunk = roster[start:start + part['students']]
+            start += len(chunk)
+            usns.extend(chunk)
+            exams.append(np.full(len(chunk), e, dtype=np.int64))
+            keys.append(np.full(len(chunk), f"{exam.get('date')}|{exam.get('session')}|{part['room']}", dtype=object))
+    if not usns:
+        return np.array([], dtype=object), np.array([], dtype=np.int64), np.array([], dtype=object)
+    return np.asarray(usns, dtype=object), np.concatenate(exams), np.concatenate(keys)
+
+
+def seat_plan(schedule, bench_size=BENCH_SIZE):
+    """Interleaved seat map for every room and session of a schedule.
+
+    Students sharing a room in a session are grouped by (exam, department)
+    and the groups are spread evenly along the room: a student's position
+    is ordered by its rank within its group over the group size, so groups
+    alternate and a large group is spaced out rather than seated in a block.
+    Seats are then filled bench by bench, `bench_size` per bench. Everything
+    runs on integer-coded arrays, one sort for the whole schedule.
+
+    Returns a DataFrame with date, session, room, bench, seat, usn,
+    department and course_code per student.
+    """
+    columns = ['date', 'session', 'room', 'bench', 'seat', 'usn', 'department', 'course_code']
+    usns, exams, keys = _seat_arrays(schedule)
+    if not len(usns):
+        return pd.DataFrame(columns=columns)
+
+    room_of, room_keys = pd.factorize(keys)
+    departments, department_names = department_codes(usns)
+    group = exams * len(department_names) + departments
+    group_of = pd.factorize(room_of * (int(group.max()) + 1) + group)[0]
+
+    # Rank of each student within its (room, exam, department) group
+    by_group = np.argsort(group_of, kind='stable')
+    sizes = np.bincount(group_of)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    rank = np.empty(len(usns), dtype=np.int64)
+    rank[by_group] = np.arange(len(usns)) - starts[group_of[by_group]]
+    spread = (rank + 0.5) / sizes[group_of]
+
+    order = np.lexsort((group_of, spread, room_of))
+    room_sorted = room_of[order]
+    room_sizes = np.bincount(room_sorted, minlength=len(room_keys))
+    room_starts = np.concatenate(([0], np.cumsum(room_sizes)[:-1]))
+    position = np.arange(len(order)) - room_starts[room_sorted]
+
+    date, session, room = zip(*(key.split('|', 2) for key in room_keys))
+    course_codes = np.asarray([exam.get('course_code') for exam in schedule], dtype=object)
+    return pd.DataFrame({
+        'date': np.asarray(date, dtype=object)[room_sorted],
+        'session': np.asarray(session, dtype=object)[room_sorted],
+        'room': np.asarray(room, dtype=object)[room_sorted],
+        'bench': position // bench_size + 1,
+        'seat': position % bench_size + 1,
+        'usn': usns[order],
+        'department': np.asarray(department_names, dtype=object)[departments[order]],
+        'course_code': course_codes[exams[order]]
+    }, columns=columns)
+
+
+def course_benches(plan, course_code):
+    """Benches holding at least one student of `course_code`, with every seat on them.
+
+    Returns a list of {date, session, room, bench, seats: [{seat, usn,
+    department, course_code}]} in room and bench order.
+    """
+    benches = plan.loc[plan['course_code'] == course_code, ['date', 'session', 'room', 'bench']].drop_duplicates()
+    seats = plan.merge(benches, on=['date', 'session', 'room', 'bench'])
+    return [
+        {
+            'date': date,
+            'session': session,
+            'room': room,
+            'bench': int(bench),
+            'seats': group[['seat', 'usn', 'department', 'course_code']].to_dict('records')
+        }
+        for (date, session, room, bench), group in seats.groupby(['date', 'session', 'room', 'bench'], sort=True)
+    ]
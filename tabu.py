@@ -0,0 +1,116 @@
+import random
+import time
+
+# Iteration budget when neither max_iterations nor a time budget is given
+DEFAULT_ITERATIONS = 5000
+
+
+def _room_orders(state):
+    """Per course: rooms to try, fitting ones smallest first, then the rest largest first"""
+    by_capacity = sorted(range(state.n_rooms), key=lambda r: state.room_capacity[r])
+    orders = {}
+    for c in range(state.n_courses):
+        need = state.enrollment[c]
+        if need not in orders:
+            split = next((i for i, r in enumerate(by_capacity) if state.room_capacity[r] >= need), state.n_rooms)
+            orders[need] = by_capacity[split:] + by_capacity[:split][::-1]
+    return [orders[state.enrollment[c]] for c in range(state.n_courses)]
+
+
+def _violating(state, c):
+    """Whether course c currently takes part in a conflict, room clash, overflow or absence"""
+    t, r = state.slots[c], state.rooms[c]
+    return (state.slot_conflicts[c][t] > 0 or state.occupancy[t][r] > 1
+            or state.enrollment[c] > state.room_capacity[r]
+            or (state.blocked is not None and state.blocked[c][t]))
+
+
+def tabu_search(state, max_iterations=None, time_budget=None, sample_size=None, tenure=None,
+                rng=None, record_every=100, on_improve=None):
+    """Tabu search over (course -> slot, room) moves on an AnnealingState.
+
+    Each iteration samples `sample_size` courses (violating ones preferred),
+    tries every slot for each with the smallest free fitting room, and makes
+    the best move that is not tabu, even if it worsens the cost. Moving a
+    course out of a slot makes returning to that slot tabu for `tenure`
+    iterations; by default the tenure adapts to the instance as
+    0.6 * violating courses + rand(0..9). A tabu move is still allowed when it
+    beats the best cost found (aspiration). Deltas come from the state's
+    incremental conflict-count matrix, so a move is scored in O(1) and
+    applied in O(degree).
+
+    Stops after `max_iterations`, `time_budget` seconds or at zero cost (with
+    neither budget given it does DEFAULT_ITERATIONS). `on_improve`, if given, is
+    called as on_improve(slots, rooms, cost) on every new best. Returns a dict with the
+    best slots/rooms, its cost, iterations, elapsed time and a best-cost curve.
+    """
+    started = time.time()
+    rng = rng or random.Random()
+    deadline = started + time_budget if time_budget else None
+    if max_iterations is None and deadline is None:
+        max_iterations = DEFAULT_ITERATIONS
+    n_courses, n_slots = state.n_courses, state.n_slots
+    sample_size = min(n_courses, sample_size or max(20, int(n_courses ** 0.5)))
+    room_orders = _room_orders(state) if state.n_rooms else None
+    occupancy = state.occupancy
+
+    best_slots, best_rooms, best_cost = list(state.slots), list(state.rooms), state.cost
+    curve = [(0, best_cost)]
+    tabu_until = [[0] * n_slots for _ in range(n_courses)]
+    iterations = 0
+
+    while n_courses and room_orders and best_cost > 0:
+        if max_iterations is not None and iterations >= max_iterations:
+            break
+        if deadline is not None and iterations % 10 == 0 and time.time() >= deadline:
+            break
+        iterations += 1
+
+        sample = rng.sample(range(n_courses), sample_size)
+        candidates = [c for c in sample if _violating(state, c)] or sample
+        move, move_delta = None, None
+        for c in candidates:
+            t0, r0 = state.slots[c], state.rooms[c]
+            for t in range(n_slots):
+                row = occupancy[t]
+                room = next((r for r in room_orders[c] if row[r] == 0 or (t == t0 and r == r0)), r0)
+                if t == t0 and room == r0:
+                    continue
+                delta = state.move_delta(c, t, room)
+                if move_delta is not None and delta >= move_delta:
+                    continue
+                # Aspiration: a tabu move is fine if it reaches a new best
+                if tabu_until[c][t] > iterations and state.cost + delta >= best_cost:
+                    continue
+                move, move_delta = (c, t, room), delta
+        if move is None:
+            continue
+
+        c, t, room = move
+        t0 = state.slots[c]
+        state.apply_move(c, t, room, move_delta)
+        if t != t0:
+            if tenure is None:
+                violating = sum(1 for course in candidates if _violating(state, course))
+                tenure_now = int(0.6 * violating * n_courses / sample_size) + rng.randrange(10)
+            else:
+                tenure_now = tenure
+            tabu_until[c][t0] = iterations + tenure_now
+
+        if state.cost < best_cost:
+            best_slots, best_rooms, best_cost = list(state.slots), list(state.rooms), state.cost
+            if on_improve is not None:
+                on_improve(best_slots, best_rooms, best_cost)
+        if iterations % record_every == 0:
+            curve.append((iterations, best_cost))
+
+    if curve[-1][0] != iterations:
+        curve.append((iterations, best_cost))
+    return {
+        'slots': best_slots,
+        'rooms': best_rooms,
+        'cost': best_cost,
+        'iterations': iterations,
+        'elapsed': round(time.time() - started, 3),
+        'curve': curve
+    }